@@ -0,0 +1,180 @@
+"""
+Asyncio exporter that pushes the dataset profile and per-item records to one
+or more HTTP endpoints at the same time.
+
+Each page is serialized and gzip-compressed once and shared by all
+endpoints. Every endpoint has its own keep-alive connection pool and a
+bounded queue: when a consumer falls behind, the producer waits instead of
+buffering the whole catalog (backpressure). A page that cannot be sent
+is counted as failed with the start of the response body; if the producer
+or a consumer dies, the other tasks are cancelled and the error is raised
+instead of the export hanging on a full queue.
+"""
+
+import asyncio
+import gzip
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class ExportResult:
+    endpoint: str
+    pages_sent: int = 0
+    pages_failed: int = 0
+    raw_bytes: int = 0
+    sent_bytes: int = 0
+    elapsed: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+def _snippet(response: requests.Response, limit: int = 200) -> str:
+    """Start of the response body, for error messages."""
+    try:
+        return response.text[:limit]
+    except Exception:
+        return ""
+
+
+@dataclass
+class _Page:
+    number: int
+    kind: str
+    body: bytes
+    raw_size: int
+
+
+class AsyncApiExporter:
+    def __init__(self, endpoints: List[str], page_size: int = 1000, max_in_flight: int = 4,
+                 compress: bool = True, timeout: float = 30, max_retries: int = 2):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = list(endpoints)
+        self.page_size = page_size
+        self.max_in_flight = max_in_flight
+        self.compress = compress
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    def _encode(self, number: int, kind: str, payload: Dict[str, Any]) -> _Page:
+        raw = json.dumps(payload, default=str).encode("utf-8")
+        body = gzip.compress(raw, compresslevel=6) if self.compress else raw
+        return _Page(number, kind, body, len(raw))
+
+    def _pages(self, profile: Dict[str, Any], records: Iterable[Dict[str, Any]]):
+        yield self._encode(0, "profile", profile)
+        iterator = iter(records)
+        number = 1
+        while True:
+            chunk = list(islice(iterator, self.page_size))
+            if not chunk:
+                return
+            yield self._encode(number, "records", {"page": number, "records": chunk})
+            number += 1
+
+    def _session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+        if self.compress:
+            session.headers["Content-Encoding"] = "gzip"
+        return session
+
+    async def _post(self, loop, executor, session: requests.Session, url: str,
+                    page: _Page, result: ExportResult):
+        headers = {"X-Export-Page": str(page.number), "X-Export-Kind": page.kind}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await loop.run_in_executor(
+                    executor,
+                    lambda: session.post(url, data=page.body, headers=headers, timeout=self.timeout)
+                )
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+                error = f"page {page.number}: HTTP {response.status_code} {_snippet(response)}"
+            except requests.exceptions.RequestException as e:
+                response, error = None, f"page {page.number}: {e}"
+            except Exception as e:
+                # Not a transport problem (bad payload, encoding, ...): retrying will not help
+                result.pages_failed += 1
+                result.errors.append(f"page {page.number}: {type(e).__name__}: {e}")
+                return
+            if attempt < self.max_retries:
+                await asyncio.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+        else:
+            result.pages_failed += 1
+            result.errors.append(error)
+            return
+
+        if response.ok:
+            result.pages_sent += 1
+            result.raw_bytes += page.raw_size
+            result.sent_bytes += len(page.body)
+        else:
+            result.pages_failed += 1
+            result.errors.append(f"page {page.number}: HTTP {response.status_code} {_snippet(response)}")
+
+    async def _consume(self, loop, executor, session, url, queue: asyncio.Queue,
+                       result: ExportResult, start: float):
+        while True:
+            page = await queue.get()
+            try:
+                if page is None:
+                    return
+                await self._post(loop, executor, session, url, page, result)
+                result.elapsed = time.perf_counter() - start
+            finally:
+                queue.task_done()
+
+    async def export_async(self, profile: Dict[str, Any],
+                           records: Iterable[Dict[str, Any]]) -> List[ExportResult]:
+        loop = asyncio.get_running_loop()
+        workers_per_endpoint = self.max_in_flight
+        executor = ThreadPoolExecutor(max_workers=len(self.endpoints) * workers_per_endpoint)
+        sessions = [self._session() for _ in self.endpoints]
+        results = [ExportResult(url) for url in self.endpoints]
+        queues = [asyncio.Queue(maxsize=self.max_in_flight) for _ in self.endpoints]
+        start = time.perf_counter()
+
+        consumers = [
+            asyncio.create_task(self._consume(loop, executor, session, url, queue, result, start))
+            for session, url, queue, result in zip(sessions, self.endpoints, queues, results)
+            for _ in range(workers_per_endpoint)
+        ]
+
+        async def produce():
+            for page in self._pages(profile, records):
+                # Blocks while the slowest endpoint's queue is full
+                for queue in queues:
+                    await queue.put(page)
+            for queue in queues:
+                for _ in range(workers_per_endpoint):
+                    await queue.put(None)
+
+        tasks = [asyncio.create_task(produce()), *consumers]
+        try:
+            # A task that dies must not leave the others waiting on a queue forever
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                task.result()
+        finally:
+            for session in sessions:
+                session.close()
+            executor.shutdown(wait=False)
+        return results
+
+    def export(self, profile: Dict[str, Any], records: Optional[Iterable[Dict[str, Any]]] = None) -> List[ExportResult]:
+        return asyncio.run(self.export_async(profile, records or []))
@@ -0,0 +1,285 @@
+"""
+Concurrent, retrying batch uploader for Recombee.
+
+Items are grouped into `Batch` requests and sent through a bounded worker
+pool. Batches that fail with a timeout, a dropped connection or a retryable
+status (and retryable requests inside a batch) are retried with exponential
+backoff and full jitter; whatever still fails after the last attempt is
+collected in the final `UploadReport`. Any other whole-batch error (a bad
+token, a malformed request) is raised at once instead of being retried for
+every batch.
+
+With an `AdaptiveBatchSizer`, batches are capped by serialized size and the
+batch size is tuned from the observed round-trip latency and errors.
+"""
+
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import requests
+from recombee_api_client.api_requests import Batch, Request, SetItemValues
+from recombee_api_client.exceptions import ApiTimeoutException, ResponseException
+
+# Status codes inside a batch response that are worth another attempt
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether a whole-batch failure is worth another attempt."""
+    if isinstance(error, ResponseException):
+        return error.status_code in RETRYABLE_CODES
+    return isinstance(error, (ApiTimeoutException, requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout))
+
+
+def set_item_values_request(item: Dict[str, Any]) -> Request:
+    return SetItemValues(
+        item_id=item["item_id"],
+        values=item["properties"],
+        cascade_create=True
+    )
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class AdaptiveBatchSizer:
+    """
+    Picks batch sizes from observed latency, errors and payload bytes.
+
+    Each batch is closed when it reaches the current size or `max_bytes` of
+    serialized items, whichever comes first. After every round trip the size
+    grows by `growth` while latency stays under the target, shrinks in
+    proportion when the target is exceeded and halves on errors.
+    """
+
+    def __init__(self, initial_size: int = 100, min_size: int = 1, max_size: int = 10000,
+                 max_bytes: int = 1_000_000, target_latency: float = 1.0, growth: float = 1.25):
+        self.size = max(min_size, min(initial_size, max_size))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.growth = growth
+        self.chosen_sizes: List[int] = []
+        self.byte_capped = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def item_bytes(item: Dict[str, Any]) -> int:
+        return len(json.dumps(item, separators=(",", ":"), default=str))
+
+    def batches(self, items: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        batch, batch_bytes = [], 0
+        for item in items:
+            size = self.item_bytes(item)
+            if batch and batch_bytes + size > self.max_bytes:
+                self.byte_capped += 1
+                yield self._close(batch)
+                batch, batch_bytes = [], 0
+            batch.append(item)
+            batch_bytes += size
+            if len(batch) >= self.size:
+                yield self._close(batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            yield self._close(batch)
+
+    def _close(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.chosen_sizes.append(len(batch))
+        return batch
+
+    def observe(self, batch_len: int, latency: float, had_errors: bool):
+        with self._lock:
+            if had_errors:
+                new_size = self.size // 2
+            elif latency > self.target_latency:
+                new_size = int(self.size * self.target_latency / latency)
+            elif latency < 0.8 * self.target_latency and batch_len >= self.size:
+                # Only grow when the batch was actually full, not a byte-capped or final one
+                new_size = max(self.size + 1, int(self.size * self.growth))
+            else:
+                new_size = self.size
+            self.size = max(self.min_size, min(self.max_size, new_size))
+
+    def summary(self) -> str:
+        if not self.chosen_sizes:
+            return "no batches"
+        return (f"min {min(self.chosen_sizes)}, median {statistics.median(self.chosen_sizes):.0f}, "
+                f"max {max(self.chosen_sizes)}, final {self.size}"
+                f"{f', {self.byte_capped} capped by bytes' if self.byte_capped else ''}")
+
+
+@dataclass
+class BatchResult:
+    batch_num: int
+    sent: int = 0
+    retries: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    latencies: List[float] = field(default_factory=list)
+
+
+@dataclass
+class UploadReport:
+    total_items: int = 0
+    sent_items: int = 0
+    batches: int = 0
+    retries: int = 0
+    failed_items: Dict[str, str] = field(default_factory=dict)
+    batch_latencies: List[float] = field(default_factory=list)
+    elapsed: float = 0.0
+    batch_sizes: str = ""
+
+    def add(self, result: BatchResult):
+        self.batches += 1
+        self.sent_items += result.sent
+        self.retries += result.retries
+        self.total_items += result.sent + len(result.failed)
+        self.failed_items.update(result.failed)
+        self.batch_latencies.extend(result.latencies)
+
+    @property
+    def items_per_second(self) -> float:
+        return self.sent_items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def print_summary(self, max_failed: int = 20):
+        print(f"\nUpload report:")
+        print(f"  • Items sent: {self.sent_items}/{self.total_items}")
+        print(f"  • Batches: {self.batches} ({self.retries} retries)")
+        if self.batch_sizes:
+            print(f"  • Adaptive batch sizes: {self.batch_sizes}")
+        print(f"  • Elapsed: {self.elapsed:.2f}s ({self.items_per_second:.1f} items/s)")
+        if self.failed_items:
+            print(f"  • Failed items: {len(self.failed_items)}")
+            for item_id, error in list(self.failed_items.items())[:max_failed]:
+                print(f"    - {item_id}: {error}")
+            if len(self.failed_items) > max_failed:
+                print(f"    ... and {len(self.failed_items) - max_failed} more")
+        else:
+            print(f"  • Failed items: 0")
+
+
+class BatchUploader:
+    def __init__(self, client, batch_size: int = 100, concurrency: int = 4,
+                 max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 request_factory: Callable[[Dict[str, Any]], Request] = set_item_values_request,
+                 verbose: bool = True, sizer: AdaptiveBatchSizer = None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.client = client
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_factory = request_factory
+        self.verbose = verbose
+        self.sizer = sizer
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def upload(self, items: Iterable[Dict[str, Any]]) -> UploadReport:
+        """
+        Upload `items` ({"item_id": ..., "properties": {...}} dicts).
+
+        `items` may be any iterable, including a generator: at most
+        2 * concurrency batches are materialized at any time.
+        """
+        report = UploadReport()
+        start = time.perf_counter()
+        max_in_flight = self.concurrency * 2
+
+        batches = self.sizer.batches(items) if self.sizer else chunked(items, self.batch_size)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = set()
+            for batch_num, batch in enumerate(batches, start=1):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._collect(done, report)
+                in_flight.add(pool.submit(self._send_with_retry, batch_num, batch))
+            done, _ = wait(in_flight)
+            self._collect(done, report)
+
+        report.elapsed = time.perf_counter() - start
+        if self.sizer:
+            report.batch_sizes = self.sizer.summary()
+        return report
+
+    def _collect(self, futures, report: UploadReport):
+        for future in futures:
+            result = future.result()
+            report.add(result)
+            if not self.verbose:
+                continue
+            if result.failed:
+                print(f"❌ Batch {result.batch_num}: {len(result.failed)} item(s) failed "
+                      f"after {result.retries} retries")
+            else:
+                print(f"✓ Batch {result.batch_num} sent successfully ({result.sent} items)")
+
+    def _send_with_retry(self, batch_num: int, batch: List[Dict[str, Any]]) -> BatchResult:
+        result = BatchResult(batch_num=batch_num)
+        pending = batch
+
+        for attempt in range(self.max_retries + 1):
+            retry, failed = self._send_once(pending, result)
+            result.failed.update(failed)
+            if not retry or attempt == self.max_retries:
+                for item, error in retry:
+                    result.failed[item["item_id"]] = error
+                break
+            result.retries += 1
+            pending = [item for item, _ in retry]
+            time.sleep(self.backoff_delay(attempt))
+
+        return result
+
+    def _send_once(self, batch: List[Dict[str, Any]],
+                   result: BatchResult) -> Tuple[List[Tuple[Dict[str, Any], str]], Dict[str, str]]:
+        """
+        Send one attempt of a batch. Returns the items worth retrying (with
+        their last error) and the items that failed permanently.
+        """
+        start = time.perf_counter()
+        try:
+            responses = self.client.send(Batch([self.request_factory(item) for item in batch]))
+        except Exception as e:
+            if not is_retryable_error(e):
+                raise
+            if self.sizer:
+                self.sizer.observe(len(batch), time.perf_counter() - start, had_errors=True)
+            return [(item, str(e)) for item in batch], {}
+        latency = time.perf_counter() - start
+        result.latencies.append(latency)
+
+        retry, failed = [], {}
+        for item, response in zip(batch, responses):
+            code = response.get("code", 200) if isinstance(response, dict) else 200
+            if code < 400:
+                result.sent += 1
+            elif code in RETRYABLE_CODES:
+                retry.append((item, f"HTTP {code}: {response.get('json')}"))
+            else:
+                failed[item["item_id"]] = f"HTTP {code}: {response.get('json')}"
+        if self.sizer:
+            self.sizer.observe(len(batch), latency, had_errors=bool(retry))
+        return retry, failed
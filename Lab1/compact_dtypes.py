@@ -0,0 +1,168 @@
+"""
+Memory-compact dtypes for the movie dataset.
+
+An explicit schema maps columns to compact kinds:
+
+- 'category': repeated strings (genre, country, ...) become categoricals
+- 'int':      integers downcast to the smallest (nullable) integer dtype
+- 'float':    floats stored as float32 when that keeps every value's decimal form
+- 'money':    strings like "$ 2250" split into <col>_currency (categorical)
+              and <col>_amount (downcast integer)
+
+Conversions are lossless: a column whose values would not survive the
+conversion (e.g. a "TV Movie 2019" year) is left as it was. Every load
+reports the memory of each column before and after.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MOVIE_SCHEMA = {
+    'genre': 'category',
+    'country': 'category',
+    'language': 'category',
+    'director': 'category',
+    'writer': 'category',
+    'production_company': 'category',
+    'year': 'int',
+    'duration': 'int',
+    'votes': 'int',
+    'metascore': 'int',
+    'reviews_from_users': 'int',
+    'reviews_from_critics': 'int',
+    'avg_vote': 'float',
+    'budget': 'money',
+    'usa_gross_income': 'money',
+    'worlwide_gross_income': 'money',
+}
+
+_MONEY_PATTERN = r'^\s*(\S+)\s+(\d+)\s*$'
+_INT_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+
+def float32_values(values: np.ndarray) -> np.ndarray:
+    """float64 copies of float32 values, keeping their shortest decimal form (6.1, not 6.0999999)."""
+    return values.astype(str).astype('float64')
+
+
+def _memory(series: pd.Series) -> int:
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def _to_category(series: pd.Series) -> Optional[pd.Series]:
+    compact = series.astype('category')
+    # Mostly-unique strings are smaller as plain objects
+    return compact if _memory(compact) < _memory(series) else None
+
+
+def _to_int(series: pd.Series) -> Optional[pd.Series]:
+    values = pd.to_numeric(series, errors='coerce')
+    if values.notna().sum() != series.notna().sum():
+        return None
+    present = values.dropna()
+    if len(present) and not (present == np.floor(present)).all():
+        return None
+    low, high = (present.min(), present.max()) if len(present) else (0, 0)
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            if not values.isna().any():
+                return values.astype(dtype.lower())
+            return values.astype(dtype)
+    return None
+
+
+def _to_float(series: pd.Series) -> Optional[pd.Series]:
+    values = pd.to_numeric(series, errors='coerce')
+    if values.notna().sum() != series.notna().sum():
+        return None
+    compact = values.astype('float32')
+    mask = values.notna().to_numpy()
+    original = values.to_numpy(dtype='float64')[mask]
+    if not np.array_equal(float32_values(compact.to_numpy()[mask]), original):
+        return None
+    return compact
+
+
+def _split_money(series: pd.Series) -> Optional[Tuple[pd.Series, pd.Series]]:
+    parts = series.str.extract(_MONEY_PATTERN)
+    if parts[0].notna().sum() != series.notna().sum():
+        return None
+    amount = _to_int(parts[1])
+    if amount is None:
+        return None
+    return parts[0].astype('category'), amount
+
+
+def compact_frame(df: pd.DataFrame, schema: Dict[str, str] = None
+                  ) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Convert the schema columns of `df` to compact dtypes, one column at a time.
+
+    Returns the new DataFrame and a memory report with one entry per schema
+    column: {column, before_dtype, after_dtype, before_bytes, after_bytes}.
+    """
+    schema = MOVIE_SCHEMA if schema is None else schema
+    columns = {}
+    report = []
+    for name in list(df.columns):
+        series = df[name]
+        kind = schema.get(name)
+        converted = None
+        if kind == 'category':
+            converted = _to_category(series)
+        elif kind == 'int':
+            converted = _to_int(series)
+        elif kind == 'float':
+            converted = _to_float(series)
+        elif kind == 'money':
+            money = _split_money(series.astype('string'))
+            if money is not None:
+                columns[f'{name}_currency'], columns[f'{name}_amount'] = money
+                report.append({
+                    'column': name,
+                    'before_dtype': str(series.dtype),
+                    'after_dtype': f"{money[0].dtype} + {money[1].dtype}",
+                    'before_bytes': _memory(series),
+                    'after_bytes': _memory(money[0]) + _memory(money[1]),
+                })
+                continue
+
+        columns[name] = series if converted is None else converted
+        if kind is not None:
+            report.append({
+                'column': name,
+                'before_dtype': str(series.dtype),
+                'after_dtype': str(columns[name].dtype),
+                'before_bytes': _memory(series),
+                'after_bytes': _memory(columns[name]),
+            })
+    return pd.DataFrame(columns, index=df.index), report
+
+
+def compact_column_names(columns: List[str], available: List[str]) -> List[str]:
+    """Map raw column names to the columns a compact frame stores them in."""
+    names = []
+    for name in columns:
+        if name in available:
+            names.append(name)
+        else:
+            names.extend(derived for derived in (f'{name}_currency', f'{name}_amount')
+                         if derived in available)
+    return names
+
+
+def print_memory_report(report: List[Dict[str, Any]]):
+    if not report:
+        return
+    before = sum(entry['before_bytes'] for entry in report)
+    after = sum(entry['after_bytes'] for entry in report)
+    print(f"✓ Compact dtypes: {before / 1e6:.2f} MB → {after / 1e6:.2f} MB "
+          f"for {len(report)} columns ({before - after:,} bytes saved)")
+    for entry in sorted(report, key=lambda e: e['after_bytes'] - e['before_bytes']):
+        saved = entry['before_bytes'] - entry['after_bytes']
+        print(f"  • {entry['column']}: {entry['before_dtype']} → {entry['after_dtype']}, "
+              f"{entry['before_bytes']:,} → {entry['after_bytes']:,} bytes ({saved:,} saved)")
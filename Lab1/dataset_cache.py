@@ -0,0 +1,117 @@
+"""
+Binary columnar (Parquet) cache for CSV datasets.
+
+The parsed DataFrame is written next to the CSV and tagged with the source
+file's mtime and size. As long as the CSV is unchanged, later loads read the
+Parquet file instead of re-parsing the CSV, and can read just the columns an
+operation needs. Requires pyarrow; without it every load falls back to CSV.
+
+Compact loads (see compact_dtypes.py) are cached in a separate file, with
+the per-column memory report stored in the Parquet metadata.
+"""
+
+import json
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+from compact_dtypes import compact_column_names, compact_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+_MTIME_KEY = b"source_mtime_ns"
+_SIZE_KEY = b"source_size"
+_MEMORY_REPORT_KEY = b"memory_report"
+
+
+def cache_path_for(csv_path: str, compact: bool = False) -> str:
+    return os.path.splitext(csv_path)[0] + (".compact" if compact else "") + ".cache.parquet"
+
+
+def _source_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {_MTIME_KEY: str(stat.st_mtime_ns).encode(), _SIZE_KEY: str(stat.st_size).encode()}
+
+
+def is_cache_valid(csv_path: str, cache_path: str) -> bool:
+    if pq is None or not os.path.exists(cache_path):
+        return False
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except Exception:
+        return False
+    signature = _source_signature(csv_path)
+    return all(metadata.get(key) == value for key, value in signature.items())
+
+
+def write_cache(df: pd.DataFrame, csv_path: str, cache_path: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update(_source_signature(csv_path))
+    if "memory_report" in df.attrs:
+        metadata[_MEMORY_REPORT_KEY] = json.dumps(df.attrs["memory_report"]).encode()
+    table = table.replace_schema_metadata(metadata)
+    tmp_path = cache_path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_csv(csv_path: str, columns: Optional[List[str]], compact: bool) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, usecols=columns)
+    if compact:
+        df, report = compact_frame(df)
+        df.attrs["memory_report"] = report
+    return df
+
+
+def _report_for(report: list, columns) -> list:
+    kept = set(columns)
+    return [entry for entry in report
+            if entry["column"] in kept or f"{entry['column']}_amount" in kept]
+
+
+def _read_cache(cache_path: str, columns: Optional[List[str]], compact: bool) -> pd.DataFrame:
+    schema = pq.read_schema(cache_path)
+    if compact and columns:
+        columns = compact_column_names(columns, schema.names)
+    df = pd.read_parquet(cache_path, columns=columns)
+    if compact:
+        report = json.loads((schema.metadata or {}).get(_MEMORY_REPORT_KEY, b"[]"))
+        df.attrs["memory_report"] = _report_for(report, df.columns)
+    return df
+
+
+def read_csv_cached(csv_path: str, columns: Optional[List[str]] = None,
+                    use_cache: bool = True, compact: bool = False) -> pd.DataFrame:
+    """
+    Load `csv_path`, going through the Parquet cache when possible.
+
+    With `columns`, only those columns are read from the cache. A missing or
+    stale cache is rebuilt from the full CSV first. With `compact`, columns
+    get the compact dtypes of compact_dtypes.MOVIE_SCHEMA and the memory
+    report is available as `df.attrs["memory_report"]`.
+    """
+    if not use_cache or pq is None:
+        return _read_csv(csv_path, columns, compact)
+
+    cache_path = cache_path_for(csv_path, compact)
+    if is_cache_valid(csv_path, cache_path):
+        return _read_cache(cache_path, columns, compact)
+
+    df = _read_csv(csv_path, None, compact)
+    try:
+        write_cache(df, csv_path, cache_path)
+    except (OSError, pa.ArrowException) as e:
+        print(f"⚠️  Could not write dataset cache {cache_path}: {e}")
+    if columns:
+        report = df.attrs.get("memory_report")
+        df = df[compact_column_names(columns, list(df.columns)) if compact else columns]
+        if report is not None:
+            df.attrs["memory_report"] = _report_for(report, df.columns)
+    return df
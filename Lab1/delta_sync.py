@@ -0,0 +1,78 @@
+"""
+Incremental (delta) sync support for the Recombee catalog upload.
+
+A local manifest stores a content hash per item id. On later runs only new
+or changed items are sent, and items that disappeared from the catalog can
+optionally be deleted.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def content_hash(properties: Dict[str, Any]) -> str:
+    payload = json.dumps(properties, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SyncManifest:
+    """Per-item content hashes of what was last uploaded to a database."""
+
+    def __init__(self, path: str, database_id: str):
+        self.path = path
+        self.database_id = database_id
+        self.hashes: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str, database_id: str) -> "SyncManifest":
+        manifest = cls(path, database_id)
+        if not os.path.exists(path):
+            return manifest
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        # A manifest written for another database says nothing about this one
+        if data.get("database_id") == database_id:
+            manifest.hashes = data.get("items", {})
+        return manifest
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"database_id": self.database_id, "items": self.hashes}, f)
+        os.replace(tmp_path, self.path)
+
+    def diff(self, items: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int, List[str]]:
+        """
+        Split `items` against the manifest.
+
+        Returns (new or changed items, number of unchanged items, ids that are
+        in the manifest but no longer in `items`). Changed items carry their
+        new hash under "hash" so it can be recorded once the upload succeeds.
+        """
+        changed = []
+        unchanged = 0
+        seen = set()
+        for item in items:
+            item_id = item["item_id"]
+            seen.add(item_id)
+            digest = content_hash(item["properties"])
+            if self.hashes.get(item_id) == digest:
+                unchanged += 1
+            else:
+                changed.append({**item, "hash": digest})
+        removed = [item_id for item_id in self.hashes if item_id not in seen]
+        return changed, unchanged, removed
+
+    def record_uploaded(self, items: Iterable[Dict[str, Any]], failed_ids: Iterable[str]):
+        failed = set(failed_ids)
+        for item in items:
+            if item["item_id"] not in failed:
+                self.hashes[item["item_id"]] = item["hash"]
+
+    def record_deleted(self, item_ids: Iterable[str], failed_ids: Iterable[str]):
+        failed = set(failed_ids)
+        for item_id in item_ids:
+            if item_id not in failed:
+                self.hashes.pop(item_id, None)
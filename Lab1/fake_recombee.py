@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Recombee API.
+
+Implements the item, user, property and batch endpoints used by Lab1 and
+Lab2, keeping everything in memory. Latency, error rate and rate limiting
+are configurable so upload code can be tuned and tested offline.
+
+Point the scripts at it with:
+    RECOMBEE_BASE_URI=127.0.0.1:8765
+    RECOMBEE_PROTOCOL=http
+
+Usage:
+    python3 fake_recombee.py [--port 8765] [--latency 0.05] [--error-rate 0.01] [--rate-limit 50]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+_SIGNATURE_PARAMS = {"hmac_timestamp", "hmac_sign"}
+
+
+_FILTER_PATTERN = re.compile(r"""^\s*'([^']+)'\s*==\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|true|false)\s*$""")
+
+
+def _parse_filter(expression: str) -> Optional[Tuple[str, Any]]:
+    """The (property, value) of a ReQL equality filter, the only kind supported here."""
+    match = _FILTER_PATTERN.match(expression)
+    if not match:
+        return None
+    return match.group(1), json.loads(match.group(2))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FakeRecombeeStore:
+    """In-memory items, users and their property schemas."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entities: Dict[str, Dict[str, Dict[str, Any]]] = {"items": {}, "users": {}}
+        self.properties: Dict[str, Dict[str, str]] = {"items": {}, "users": {}}
+
+    def reset(self):
+        with self.lock:
+            for kind in ("items", "users"):
+                self.entities[kind].clear()
+                self.properties[kind].clear()
+
+    def dispatch(self, method: str, path: str, params: Dict[str, Any]) -> Tuple[int, Any]:
+        """Handle one API call (path relative to the database)."""
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if not parts or parts[0] not in ("items", "users"):
+            return 404, {"error": f"Unknown endpoint {path}"}
+        kind, rest = parts[0], parts[1:]
+
+        with self.lock:
+            if rest[:1] == ["properties"]:
+                return self._properties(kind, method, rest[1:], params)
+            if rest == ["list"] and method == "GET":
+                return self._list(kind, params)
+            if len(rest) == 1 and rest[0]:
+                return self._entity(kind, method, rest[0], params)
+        return 404, {"error": f"Unknown endpoint {path}"}
+
+    def _properties(self, kind: str, method: str, rest, params) -> Tuple[int, Any]:
+        props = self.properties[kind]
+        if rest == ["list"] and method == "GET":
+            return 200, [{"name": name, "type": typ} for name, typ in props.items()]
+        if len(rest) != 1:
+            return 404, {"error": "Unknown property endpoint"}
+        name = rest[0]
+        if method == "PUT":
+            if name in props:
+                return 409, {"error": f"Property {name} already exists"}
+            props[name] = params.get("type", "string")
+            return 201, "ok"
+        if method == "GET":
+            if name not in props:
+                return 404, {"error": f"Property {name} not found"}
+            return 200, {"name": name, "type": props[name]}
+        if method == "DELETE":
+            if props.pop(name, None) is None:
+                return 404, {"error": f"Property {name} not found"}
+            for values in self.entities[kind].values():
+                values.pop(name, None)
+            return 200, "ok"
+        return 405, {"error": f"Method {method} not allowed"}
+
+    def _list(self, kind: str, params) -> Tuple[int, Any]:
+        ids = list(self.entities[kind])
+        if params.get("filter"):
+            match = _parse_filter(str(params["filter"]))
+            if match is None:
+                return 400, {"error": f"Unsupported filter (only 'prop' == value): {params['filter']}"}
+            name, value = match
+            ids = [entity_id for entity_id in ids if self.entities[kind][entity_id].get(name) == value]
+        offset = int(params.get("offset", 0))
+        count = int(params.get("count", len(ids)))
+        page = ids[offset:offset + count]
+        if str(params.get("returnProperties", "")).lower() == "true":
+            return 200, [{"id": entity_id, **self.entities[kind][entity_id]} for entity_id in page]
+        return 200, page
+
+    def _entity(self, kind: str, method: str, entity_id: str, params) -> Tuple[int, Any]:
+        entities = self.entities[kind]
+        if method == "PUT":
+            if entity_id in entities:
+                return 409, {"error": f"{kind[:-1]} {entity_id} already exists"}
+            entities[entity_id] = {}
+            return 201, "ok"
+        if method == "GET":
+            if entity_id not in entities:
+                return 404, {"error": f"{kind[:-1]} {entity_id} not found"}
+            return 200, entities[entity_id]
+        if method == "DELETE":
+            if entities.pop(entity_id, None) is None:
+                return 404, {"error": f"{kind[:-1]} {entity_id} not found"}
+            return 200, "ok"
+        if method == "POST":
+            values = dict(params)
+            cascade = values.pop("!cascadeCreate", False)
+            if entity_id not in entities and not cascade:
+                return 404, {"error": f"{kind[:-1]} {entity_id} not found"}
+            unknown = [name for name in values if name not in self.properties[kind]]
+            if unknown:
+                return 400, {"error": f"Unknown properties: {', '.join(unknown)}"}
+            entities.setdefault(entity_id, {}).update(values)
+            return 200, "ok"
+        return 405, {"error": f"Method {method} not allowed"}
+
+
+class FakeRecombeeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 latency_jitter: float = 0.0, per_request_latency: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: Optional[float] = None, verbose: bool = False):
+        self.store = FakeRecombeeStore()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.per_request_latency = per_request_latency
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.verbose = verbose
+        self.stats_lock = threading.Lock()
+        self.stats = {"http_requests": 0, "api_calls": 0, "errors": 0, "rate_limited": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_uri(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> "FakeRecombeeServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key: str, n: int = 1):
+        with self.stats_lock:
+            self.stats[key] += n
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        with self.store.lock:
+            stats["items"] = len(self.store.entities["items"])
+            stats["users"] = len(self.store.entities["users"])
+        return stats
+
+    def handle(self, method: str, raw_path: str, body: bytes) -> Tuple[int, Any]:
+        split = urlsplit(raw_path)
+        params = {k: v for k, v in parse_qsl(split.query) if k not in _SIGNATURE_PARAMS}
+
+        # Control endpoints for benchmarks, not part of the Recombee API
+        if split.path == "/_stats":
+            return 200, self.snapshot()
+        if split.path == "/_reset" and method == "POST":
+            self.store.reset()
+            with self.stats_lock:
+                self.stats = {key: 0 for key in self.stats}
+            return 200, "ok"
+        if split.path in ("/_schema/items", "/_schema/users") and method == "POST":
+            # Seed property types ({"name": "type"}) without going through errors/limits
+            with self.store.lock:
+                self.store.properties[split.path.rsplit("/", 1)[1]].update(json.loads(body or b"{}"))
+            return 200, "ok"
+
+        self._count("http_requests")
+        if self.bucket and not self.bucket.take():
+            self._count("rate_limited")
+            return 429, {"error": "Too many requests"}
+
+        delay = self.latency + random.uniform(-self.latency_jitter, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self._count("errors")
+            return 500, {"error": "Injected server error"}
+
+        # Path is /{database_id}/<endpoint>
+        match = re.match(r"^/[^/]+(/.*)$", split.path)
+        if not match:
+            return 404, {"error": "Missing database id"}
+        path = match.group(1)
+        if body:
+            try:
+                params.update(json.loads(body))
+            except ValueError:
+                return 400, {"error": "Body is not valid JSON"}
+
+        if path.rstrip("/") == "/batch" and method == "POST":
+            requests_list = params.get("requests", [])
+            if self.per_request_latency:
+                time.sleep(self.per_request_latency * len(requests_list))
+            self._count("api_calls", len(requests_list))
+            responses = []
+            for req in requests_list:
+                code, payload = self.store.dispatch(req.get("method", "GET").upper(),
+                                                    req.get("path", ""), req.get("params", {}))
+                responses.append({"code": code, "json": payload})
+            return 200, responses
+
+        self._count("api_calls")
+        return self.store.dispatch(method, path, params)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                code, payload = server.handle(self.command, self.path, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_PUT = do_POST = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                if server.verbose:
+                    super().log_message(format, *args)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Recombee API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP request")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--per-request-latency", type=float, default=0.0,
+                        help="extra seconds per request inside a batch")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=None, help="max HTTP requests per second (429 above)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeRecombeeServer(args.host, args.port, args.latency, args.latency_jitter,
+                                args.per_request_latency, args.error_rate, args.rate_limit, args.verbose)
+    print(f"Fake Recombee listening on http://{server.base_uri}")
+    print(f"Use: RECOMBEE_BASE_URI={server.base_uri} RECOMBEE_PROTOCOL=http")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping.")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,152 @@
+import numpy as np
 import pandas as pd
 import requests
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional
 import sys
 import os
 from dotenv import load_dotenv
-from recombee_api_client.api_client import RecombeeClient, Region
-from recombee_api_client.api_requests import SetItemValues, Batch, AddItemProperty, GetItemValues
+from recombee_api_client.api_requests import SetItemValues, Batch, DeleteItem
+
+from api_exporter import AsyncApiExporter
+from batch_uploader import AdaptiveBatchSizer, BatchUploader
+from compact_dtypes import compact_frame, float32_values, print_memory_report
+from dataset_cache import read_csv_cached
+from dataset_profile import DatasetProfiler, profile_dataframe
+from delta_sync import SyncManifest
+from payload_store import payloads_path_for, write_payloads
+from recombee_client import create_recombee_client
+from recombee_schema import SchemaManager
+
+# Item properties sent to Recombee: (column, Recombee property type)
+RECOMBEE_ITEM_PROPERTIES = [
+    ('title', 'string'),
+    ('year', 'int'),
+    ('genre', 'string'),
+    ('duration', 'int'),
+    ('avg_vote', 'double'),
+    ('country', 'string'),
+    ('language', 'string'),
+    ('director', 'string'),
+    ('votes', 'int')
+]
+
+
+def _column_values(series: pd.Series, prop_type: str) -> List[Any]:
+    """Cast a whole column to Python values for Recombee, with None for nulls."""
+    if prop_type in ('int', 'double'):
+        values = pd.to_numeric(series, errors='coerce')
+    else:
+        values = series
+    mask = values.notna().to_numpy()
+    out = np.full(len(values), None, dtype=object)
+    if prop_type == 'int':
+        out[mask] = values[mask].astype('int64').tolist()
+    elif prop_type == 'double' and values.dtype == 'float32':
+        out[mask] = float32_values(values[mask].to_numpy()).tolist()
+    elif prop_type == 'double':
+        out[mask] = values[mask].astype('float64').tolist()
+    else:
+        out[mask] = values[mask].astype(str).tolist()
+    return out.tolist()
+
+
+# Column holding the Recombee item ids
+ITEM_ID_COLUMN = 'imdb_title_id'
+
+
+def item_id_column(df: pd.DataFrame) -> Optional[str]:
+    """ITEM_ID_COLUMN when the frame has it, else None (ids from the row index)."""
+    return ITEM_ID_COLUMN if ITEM_ID_COLUMN in df.columns else None
+
+
+def iter_item_payloads(df: pd.DataFrame, id_column: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ready-to-send SetItemValues payloads ({"item_id", "properties"}).
+
+    Every property column is cast and null-masked once, in a vectorized pass;
+    the per-row work is only zipping the prepared columns into dicts.
+    Item ids come from `id_column`, or from the 1-based DataFrame index.
+    """
+    if id_column:
+        item_ids = df[id_column].astype(str).tolist()
+    else:
+        item_ids = (df.index + 1).astype(str).tolist()
+
+    names = [name for name, _ in RECOMBEE_ITEM_PROPERTIES if name in df.columns]
+    columns = [_column_values(df[name], prop_type)
+               for name, prop_type in RECOMBEE_ITEM_PROPERTIES if name in df.columns]
+
+    for item_id, *values in zip(item_ids, *columns):
+        yield {
+            "item_id": item_id,
+            "properties": {name: value for name, value in zip(names, values) if value is not None}
+        }
+
+
+# Product attributes reported by the analyzer: (column, type, description)
+PRODUCT_ATTRIBUTES = [
+    ('title', 'string', 'Movie title'),
+    ('year', 'integer', 'Year of release'),
+    ('genre', 'string', 'Movie genre(s)'),
+    ('duration', 'integer', 'Movie duration in minutes'),
+    ('avg_vote', 'float', 'Average rating/vote'),
+    ('budget', 'string', 'Movie budget'),
+    ('budget_amount', 'integer', 'Movie budget amount (compact loading)'),
+    ('budget_currency', 'string', 'Currency of the movie budget (compact loading)'),
+    ('country', 'string', 'Country of production'),
+    ('language', 'string', 'Primary language'),
+    ('director', 'string', 'Movie director'),
+    ('votes', 'integer', 'Number of votes')
+]
+
+_EXAMPLE_CASTS = {'integer': int, 'float': float}
+
+# Columns needed to build and key the Recombee item payloads
+UPLOAD_COLUMNS = [ITEM_ID_COLUMN] + [name for name, _ in RECOMBEE_ITEM_PROPERTIES]
+
 
 class MovieDatasetAnalyzer:
-    def __init__(self, csv_file_path: str):
+    def __init__(self, csv_file_path: str, columns: List[str] = None, use_cache: bool = True,
+                 streaming: bool = False, chunk_size: int = 10000, compact: bool = False):
         self.csv_file_path = csv_file_path
+        self.use_cache = use_cache
+        self.compact = compact
+        self.chunk_size = chunk_size
         self.df = None
-        self.load_dataset()
+        self._profile = None
+        if streaming:
+            # Nothing is held in memory; every operation reads the CSV in chunks
+            if not os.path.exists(csv_file_path):
+                print(f"❌ Error: File {csv_file_path} not found")
+                sys.exit(1)
+            print(f"✓ Streaming mode: reading {csv_file_path} in chunks of {chunk_size} rows")
+        else:
+            self.load_dataset(columns)
         
         load_dotenv()
         self.recombee_url = os.getenv('RECOMBEE_URL')
         self.recombee_database_id = os.getenv('RECOMBEE_DATABASE_ID')
         self.recombee_secret_token = os.getenv('RECOMBEE_SECRET_TOKEN')
         self.recombee_batch_size = int(os.getenv('RECOMBEE_BATCH_SIZE', '100'))
+        self.recombee_concurrency = int(os.getenv('RECOMBEE_CONCURRENCY', '4'))
+        self.recombee_max_retries = int(os.getenv('RECOMBEE_MAX_RETRIES', '3'))
+        self.recombee_schema_ttl = int(os.getenv('RECOMBEE_SCHEMA_TTL', '3600'))
+        self.recombee_adaptive_batching = os.getenv('RECOMBEE_ADAPTIVE_BATCHING', 'false').strip().lower() in ('1', 'true', 'yes')
+        self.recombee_max_batch_bytes = int(os.getenv('RECOMBEE_MAX_BATCH_BYTES', '1000000'))
+        self.recombee_target_latency_ms = int(os.getenv('RECOMBEE_TARGET_LATENCY_MS', '1000'))
+        self.recombee_sync_mode = os.getenv('RECOMBEE_SYNC_MODE', 'full').strip().lower()
+        self.recombee_delete_missing = os.getenv('RECOMBEE_DELETE_MISSING', 'false').strip().lower() in ('1', 'true', 'yes')
         
-    def load_dataset(self):
+    def load_dataset(self, columns: List[str] = None):
         try:
-            self.df = pd.read_csv(self.csv_file_path)
+            self.df = read_csv_cached(self.csv_file_path, columns=columns, use_cache=self.use_cache,
+                                      compact=self.compact)
+            self._profile = None
             print(f"✓ Dataset loaded successfully: {len(self.df)} movies")
             print(f"✓ Dataset columns: {list(self.df.columns)}")
+            if self.compact:
+                print_memory_report(self.memory_report())
         except FileNotFoundError:
             print(f"❌ Error: File {self.csv_file_path} not found")
             sys.exit(1)
@@ -32,91 +154,71 @@ class MovieDatasetAnalyzer:
             print(f"❌ Error loading dataset: {e}")
             sys.exit(1)
     
+    def iter_chunks(self, chunk_size: int = None, columns: List[str] = None) -> Iterator[pd.DataFrame]:
+        chunks = pd.read_csv(self.csv_file_path, chunksize=chunk_size or self.chunk_size, usecols=columns)
+        if not self.compact:
+            return chunks
+        return (compact_frame(chunk)[0] for chunk in chunks)
+    
+    def memory_report(self) -> List[Dict[str, Any]]:
+        """Per-column memory before/after compact loading (empty when not compact)."""
+        if self.df is None:
+            return []
+        return self.df.attrs.get('memory_report', [])
+    
+    def profile(self) -> Dict[str, Any]:
+        """Statistics shared by all reports, computed once per loaded dataset."""
+        if self._profile is None:
+            if self.df is not None:
+                self._profile = profile_dataframe(self.df)
+            else:
+                profiler = DatasetProfiler()
+                for chunk in self.iter_chunks():
+                    profiler.update(chunk)
+                self._profile = profiler.result()
+        return self._profile
+    
     def analyze_dataset(self):
         print("\n" + "="*60)
         print("MOVIE DATASET ANALYSIS")
         print("="*60)
         
-        print(f"Total movies: {len(self.df)}")
-        print(f"Total attributes: {len(self.df.columns)}")
+        profile = self.profile()
+        print(f"Total movies: {profile['rows']}")
+        print(f"Total attributes: {len(profile['columns'])}")
         
         print(f"\nData types:")
-        for col in self.df.columns:
-            dtype = str(self.df[col].dtype)
-            non_null_count = self.df[col].count()
-            print(f"  {col}: {dtype} ({non_null_count} non-null values)")
+        for col, info in profile['columns'].items():
+            print(f"  {col}: {info['dtype']} ({info['non_null']} non-null values)")
         
-        numeric_cols = self.df.select_dtypes(include=['int64', 'float64']).columns
-        if len(numeric_cols) > 0:
+        if profile['numeric']:
             print(f"\nNumeric columns statistics:")
-            print(self.df[numeric_cols].describe())
+            print(pd.DataFrame(profile['numeric']))
+            if self.df is None:
+                print("  (streaming mode: quartiles are omitted, they need the whole column in memory)")
         
         print(f"\nSample movies:")
-        print(self.df[['title', 'year', 'genre', 'avg_vote', 'duration']].head())
+        sample = self.df.head() if self.df is not None else next(iter(self.iter_chunks(5)))
+        sample_cols = [c for c in ['title', 'year', 'genre', 'avg_vote', 'duration'] if c in sample.columns]
+        print(sample[sample_cols])
     
     def get_product_attributes(self) -> Dict[str, Dict[str, Any]]:
-        attributes = {
-            'title': {
-                'type': 'string',
-                'description': 'Movie title',
-                'example': self.df['title'].dropna().iloc[0] if not self.df['title'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['title'].count())
-            },
-            'year': {
-                'type': 'integer',
-                'description': 'Year of release',
-                'example': int(self.df['year'].dropna().iloc[0]) if not self.df['year'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['year'].count())
-            },
-            'genre': {
-                'type': 'string',
-                'description': 'Movie genre(s)',
-                'example': self.df['genre'].dropna().iloc[0] if not self.df['genre'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['genre'].count())
-            },
-            'duration': {
-                'type': 'integer',
-                'description': 'Movie duration in minutes',
-                'example': int(self.df['duration'].dropna().iloc[0]) if not self.df['duration'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['duration'].count())
-            },
-            'avg_vote': {
-                'type': 'float',
-                'description': 'Average rating/vote',
-                'example': float(self.df['avg_vote'].dropna().iloc[0]) if not self.df['avg_vote'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['avg_vote'].count())
-            },
-            'budget': {
-                'type': 'string',
-                'description': 'Movie budget',
-                'example': self.df['budget'].dropna().iloc[0] if not self.df['budget'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['budget'].count())
-            },
-            'country': {
-                'type': 'string',
-                'description': 'Country of production',
-                'example': self.df['country'].dropna().iloc[0] if not self.df['country'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['country'].count())
-            },
-            'language': {
-                'type': 'string',
-                'description': 'Primary language',
-                'example': self.df['language'].dropna().iloc[0] if not self.df['language'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['language'].count())
-            },
-            'director': {
-                'type': 'string',
-                'description': 'Movie director',
-                'example': self.df['director'].dropna().iloc[0] if not self.df['director'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['director'].count())
-            },
-            'votes': {
-                'type': 'integer',
-                'description': 'Number of votes',
-                'example': int(self.df['votes'].dropna().iloc[0]) if not self.df['votes'].dropna().empty else 'N/A',
-                'non_null_count': int(self.df['votes'].count())
+        columns = self.profile()['columns']
+        attributes = {}
+        for name, attr_type, description in PRODUCT_ATTRIBUTES:
+            if name not in columns:
+                continue
+            example = columns[name]['example']
+            if example is None:
+                example = 'N/A'
+            elif attr_type in _EXAMPLE_CASTS:
+                example = _EXAMPLE_CASTS[attr_type](example)
+            attributes[name] = {
+                'type': attr_type,
+                'description': description,
+                'example': example,
+                'non_null_count': columns[name]['non_null']
             }
-        }
         
         return attributes
     
@@ -137,7 +239,11 @@ class MovieDatasetAnalyzer:
             print(f"  Example: {attr_info['example']}")
             print(f"  Non-null values: {attr_info['non_null_count']}")
     
-    def send_attributes_to_recombee(self, database_id: str = None, secret_token: str = None):
+    def send_attributes_to_recombee(self, database_id: str = None, secret_token: str = None,
+                                    concurrency: int = None, max_retries: int = None,
+                                    delta: bool = None, delete_missing: bool = None,
+                                    manifest_path: str = None, chunk_size: int = None,
+                                    adaptive: bool = None):
         print("\n" + "="*60)
         print("SENDING ATTRIBUTES TO RECOMBEE")
         print("="*60)
@@ -145,6 +251,11 @@ class MovieDatasetAnalyzer:
         db_id = database_id or self.recombee_database_id
         token = secret_token or self.recombee_secret_token
         batch_size = self.recombee_batch_size
+        concurrency = concurrency or self.recombee_concurrency
+        max_retries = self.recombee_max_retries if max_retries is None else max_retries
+        delta = self.recombee_sync_mode == 'delta' if delta is None else delta
+        delete_missing = self.recombee_delete_missing if delete_missing is None else delete_missing
+        adaptive = self.recombee_adaptive_batching if adaptive is None else adaptive
         
         if not all([db_id, token]):
             print("❌ Missing Recombee credentials!")
@@ -158,140 +269,204 @@ class MovieDatasetAnalyzer:
         
         print(f"✓ Using credentials from {'environment variables' if not database_id else 'manual input'}")
         print(f"✓ Database ID: {db_id}")
-        print(f"✓ Batch size: {batch_size}")
+        if adaptive:
+            print(f"✓ Batch size: adaptive, starting at {batch_size} "
+                  f"(≤ {self.recombee_max_batch_bytes} bytes, target {self.recombee_target_latency_ms} ms)")
+        else:
+            print(f"✓ Batch size: {batch_size}")
+        print(f"✓ Concurrency: {concurrency} (max {max_retries} retries per batch)")
+        print(f"✓ Sync mode: {'delta' + (' (with deletions)' if delete_missing else '') if delta else 'full'}")
+        
+        streaming = self.df is None or chunk_size is not None
+        if streaming and delta:
+            print("❌ Delta sync needs the whole catalog in memory; it is not available in streaming mode")
+            return
         
         try:
-            client = RecombeeClient(db_id, token, region=Region.EU_WEST)
+            client = create_recombee_client(db_id, token)
             print("✓ Recombee client initialized successfully")
             
-            print("Creating item properties...")
-            properties = [
-                ('title', 'string'),
-                ('year', 'int'),
-                ('genre', 'string'),
-                ('duration', 'int'),
-                ('avg_vote', 'double'),
-                ('country', 'string'),
-                ('language', 'string'),
-                ('director', 'string'),
-                ('votes', 'int')
-            ]
-            
-            for prop_name, prop_type in properties:
-                try:
-                    client.send(AddItemProperty(prop_name, prop_type))
-                    print(f"✓ Created property: {prop_name} ({prop_type})")
-                except Exception as e:
-                    print(f"⚠️  Property {prop_name} might already exist")
-            
-            print("✓ Properties setup complete")
+            print("Checking item properties...")
+            schema = SchemaManager(
+                client,
+                cache_path=os.path.join(os.path.dirname(os.path.abspath(self.csv_file_path)),
+                                        f'.recombee_schema.{db_id}.item.json'),
+                ttl=self.recombee_schema_ttl
+            )
+            schema_report = schema.ensure(RECOMBEE_ITEM_PROPERTIES)
+            schema_report.print_summary()
+            if schema_report.ok:
+                print("✓ Properties setup complete")
+            else:
+                print("⚠️  Properties setup finished with problems; affected values may be rejected")
             
-            items_to_update = []
+            uploader = BatchUploader(
+                client,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                max_retries=max_retries,
+                sizer=AdaptiveBatchSizer(
+                    initial_size=batch_size,
+                    max_bytes=self.recombee_max_batch_bytes,
+                    target_latency=self.recombee_target_latency_ms / 1000
+                ) if adaptive else None
+            )
             
-            for index, row in self.df.iterrows():
-                item_id = str(index + 1)
-                
-                item_properties = {
-                    "title": str(row['title']),
-                    "year": int(row['year']) if pd.notna(row['year']) else None,
-                    "genre": str(row['genre']) if pd.notna(row['genre']) else None,
-                    "duration": int(row['duration']) if pd.notna(row['duration']) else None,
-                    "avg_vote": float(row['avg_vote']) if pd.notna(row['avg_vote']) else None,
-                    "country": str(row['country']) if pd.notna(row['country']) else None,
-                    "language": str(row['language']) if pd.notna(row['language']) else None,
-                    "director": str(row['director']) if pd.notna(row['director']) else None,
-                    "votes": int(row['votes']) if pd.notna(row['votes']) else None
-                }
+            if delta:
+                report = self._sync_delta(uploader, db_id, delete_missing, manifest_path)
+            elif streaming:
+                report = self._stream_upload(uploader, chunk_size)
+            else:
+                items_to_update = list(iter_item_payloads(self.df, id_column=item_id_column(self.df)))
+                total_batches = (len(items_to_update) + batch_size - 1) // batch_size
                 
-                item_properties = {k: v for k, v in item_properties.items() if v is not None}
+                print(f"Updating {len(items_to_update)} items in {total_batches} batches...")
                 
-                items_to_update.append({
-                    "item_id": item_id,
-                    "properties": item_properties
-                })
-            
-            total_batches = (len(items_to_update) + batch_size - 1) // batch_size
-            
-            print(f"Updating {len(items_to_update)} items in {total_batches} batches...")
-            
-            for batch_num in range(total_batches):
-                start_idx = batch_num * batch_size
-                end_idx = min(start_idx + batch_size, len(items_to_update))
-                batch = items_to_update[start_idx:end_idx]
+                report = uploader.upload(items_to_update)
+                report.print_summary()
                 
-                try:
-                    print(f"Sending batch {batch_num + 1}/{total_batches} ({len(batch)} items)...")
-                    
-                    requests_list = []
-                    for item in batch:
-                        requests_list.append(
-                            SetItemValues(
-                                item_id=item["item_id"],
-                                values=item["properties"]
-                            )
-                        )
-                    
-                    client.send(Batch(requests_list))
-                    print(f"✓ Batch {batch_num + 1} sent successfully")
-                    
-                except Exception as e:
-                    print(f"❌ Error sending batch {batch_num + 1}: {e}")
-            
-            print(f"\n✓ Completed sending {len(items_to_update)} items to Recombee")
+                print(f"\n✓ Completed sending {report.sent_items}/{len(items_to_update)} items to Recombee")
             print("You can now check your Recombee admin panel to see the additional properties!")
+            return report
             
         except Exception as e:
             print(f"❌ Error initializing Recombee client: {e}")
             print("Please check your credentials and try again.")
 
-    def send_attributes_to_api(self, api_url: str = "https://httpbin.org/post"):
+    def _stream_upload(self, uploader: BatchUploader, chunk_size: int = None):
+        chunk_size = chunk_size or self.chunk_size
+        profiler = DatasetProfiler()
+        
+        def items():
+            for chunk_num, chunk in enumerate(self.iter_chunks(chunk_size), start=1):
+                profiler.update(chunk)
+                print(f"Streaming chunk {chunk_num} ({len(chunk)} movies)...")
+                yield from iter_item_payloads(chunk, id_column=item_id_column(chunk))
+        
+        print(f"Streaming items in chunks of {chunk_size} rows...")
+        report = uploader.upload(items())
+        report.print_summary()
+        # The upload already walked the whole file, so the reports can reuse its statistics
+        self._profile = profiler.result()
+        
+        print(f"\n✓ Completed sending {report.sent_items}/{report.total_items} items to Recombee")
+        return report
+
+    def _sync_delta(self, uploader: BatchUploader, database_id: str,
+                    delete_missing: bool, manifest_path: str = None):
+        manifest_path = manifest_path or os.path.splitext(self.csv_file_path)[0] + '.manifest.json'
+        manifest = SyncManifest.load(manifest_path, database_id)
+        print(f"✓ Manifest: {manifest_path} ({len(manifest.hashes)} items recorded)")
+        
+        items = iter_item_payloads(self.df, id_column=item_id_column(self.df))
+        changed, unchanged, removed = manifest.diff(items)
+        print(f"Delta: {len(changed)} new/changed, {unchanged} unchanged, {len(removed)} removed")
+        
+        report = None
+        if changed:
+            report = uploader.upload(changed)
+            report.print_summary()
+            manifest.record_uploaded(changed, report.failed_items)
+            print(f"\n✓ Completed sending {report.sent_items}/{len(changed)} changed items to Recombee")
+        else:
+            print("✓ Catalog is up to date, nothing to send")
+        
+        if removed and delete_missing:
+            print(f"Deleting {len(removed)} items no longer in the catalog...")
+            deleter = BatchUploader(
+                uploader.client,
+                batch_size=uploader.batch_size,
+                concurrency=uploader.concurrency,
+                max_retries=uploader.max_retries,
+                request_factory=lambda item: DeleteItem(item["item_id"])
+            )
+            delete_report = deleter.upload({"item_id": item_id} for item_id in removed)
+            delete_report.print_summary()
+            manifest.record_deleted(removed, delete_report.failed_items)
+        elif removed:
+            print(f"⚠️  {len(removed)} items are no longer in the catalog (enable deletions to remove them)")
+        
+        manifest.save()
+        return report
+
+    def export_payloads(self, path: str = None, chunk_size: int = None) -> str:
+        """
+        Write the Recombee item payloads to a gzip-compressed NDJSON file.
+
+        The file holds exactly what a full upload would send and can be
+        uploaded later, or from several workers, with replay_payloads.py.
+        """
+        print("\n" + "="*60)
+        print("EXPORTING RECOMBEE PAYLOADS")
+        print("="*60)
+
+        path = path or payloads_path_for(self.csv_file_path)
+        if self.df is not None and chunk_size is None:
+            items = iter_item_payloads(self.df, id_column=item_id_column(self.df))
+        else:
+            items = (item for chunk in self.iter_chunks(chunk_size or self.chunk_size, columns=UPLOAD_COLUMNS)
+                     for item in iter_item_payloads(chunk, id_column=item_id_column(chunk)))
+
+        count = write_payloads(path, items, RECOMBEE_ITEM_PROPERTIES)
+        print(f"✓ Exported {count} item payloads to {path} ({os.path.getsize(path):,} bytes)")
+        print(f"  Upload them with: python replay_payloads.py {path}")
+        return path
+
+    def send_attributes_to_api(self, api_url: str = "https://httpbin.org/post", api_urls: List[str] = None,
+                               include_records: bool = True, page_size: int = 1000,
+                               max_in_flight: int = 4, compress: bool = True):
         print("\n" + "="*60)
         print("SENDING ATTRIBUTES TO API")
         print("="*60)
         
         attributes = self.get_product_attributes()
+        endpoints = api_urls or [api_url]
         
         payload = {
             "dataset_info": {
                 "name": "Movies Dataset",
-                "total_products": len(self.df),
+                "total_products": self.profile()['rows'],
                 "description": "Dataset containing 1000 movies with various attributes"
             },
             "product_attributes": attributes,
             "timestamp": pd.Timestamp.now().isoformat()
         }
         
+        records = self._iter_records() if include_records else None
+        
         try:
-            print(f"Sending data to: {api_url}")
+            print(f"Sending data to: {', '.join(endpoints)}")
             print(f"Payload structure:")
             print(f"  - Dataset info: {payload['dataset_info']}")
             print(f"  - Number of attributes: {len(payload['product_attributes'])}")
+            print(f"  - Item records: {'pages of ' + str(page_size) if include_records else 'not included'}")
+            print(f"  - Compression: {'gzip' if compress else 'none'}, {max_in_flight} requests in flight per endpoint")
             
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
-            )
-            
-            print(f"\nResponse Status Code: {response.status_code}")
+            exporter = AsyncApiExporter(endpoints, page_size=page_size,
+                                        max_in_flight=max_in_flight, compress=compress)
+            results = exporter.export(payload, records)
             
-            if response.status_code == 200:
-                print("✓ Successfully sent attributes to API")
-                try:
-                    response_data = response.json()
-                    print(f"Response: {json.dumps(response_data, indent=2)}")
-                except:
-                    print(f"Response text: {response.text}")
-            else:
-                print(f"❌ API request failed with status {response.status_code}")
-                print(f"Response: {response.text}")
+            for result in results:
+                print(f"\n{result.endpoint}:")
+                if result.pages_failed:
+                    print(f"❌ {result.pages_failed} page(s) failed, {result.pages_sent} sent")
+                    for error in result.errors[:5]:
+                        print(f"  - {error}")
+                else:
+                    print(f"✓ Successfully sent {result.pages_sent} page(s)")
+                ratio = result.sent_bytes / result.raw_bytes if result.raw_bytes else 1.0
+                print(f"  {result.raw_bytes:,} bytes of JSON sent as {result.sent_bytes:,} bytes "
+                      f"({ratio:.0%}) in {result.elapsed:.2f}s")
                 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error sending request: {e}")
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
     
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Item records keyed by imdb_title_id, from memory or chunk by chunk."""
+        frames = [self.df] if self.df is not None else self.iter_chunks(columns=UPLOAD_COLUMNS)
+        for frame in frames:
+            yield from iter_item_payloads(frame, id_column=item_id_column(frame))
+    
     def generate_summary_report(self):
         print("\n" + "="*60)
         print("DATASET SUMMARY REPORT")
@@ -299,8 +474,9 @@ class MovieDatasetAnalyzer:
         
         print(f"Dataset: Movies Dataset")
         print(f"File: {os.path.basename(self.csv_file_path)}")
-        print(f"Total records: {len(self.df)}")
-        print(f"Total attributes: {len(self.df.columns)}")
+        profile = self.profile()
+        print(f"Total records: {profile['rows']}")
+        print(f"Total attributes: {len(profile['columns'])}")
         
         attributes = self.get_product_attributes()
         print(f"\nKey Product Attributes:")
@@ -308,23 +484,22 @@ class MovieDatasetAnalyzer:
             print(f"  • {attr_name}: {attr_info['type']} - {attr_info['description']}")
         
         print(f"\nData Quality:")
-        print(f"  • Complete records: {len(self.df.dropna())}")
-        print(f"  • Records with missing data: {len(self.df) - len(self.df.dropna())}")
+        print(f"  • Complete records: {profile['complete_rows']}")
+        print(f"  • Records with missing data: {profile['rows'] - profile['complete_rows']}")
         
-        if 'genre' in self.df.columns:
-            genre_counts = self.df['genre'].value_counts().head(10)
+        if 'genre' in profile['top_values']:
             print(f"\nTop 10 Genres:")
-            for genre, count in genre_counts.items():
+            for genre, count in profile['top_values']['genre']:
                 print(f"  • {genre}: {count} movies")
         
-        if 'year' in self.df.columns:
-            year_stats = self.df['year'].describe()
+        if 'year' in profile['numeric']:
+            year_stats = profile['numeric']['year']
             print(f"\nYear Statistics:")
             print(f"  • Range: {int(year_stats['min'])} - {int(year_stats['max'])}")
             print(f"  • Average: {year_stats['mean']:.1f}")
         
         print(f"\n✓ Dataset meets requirements:")
-        print(f"  • Has 1000+ products: ✓ ({len(self.df)} movies)")
+        print(f"  • Has 1000+ products: ✓ ({profile['rows']} movies)")
         print(f"  • Has 3+ attributes: ✓ ({len(attributes)} attributes)")
         print(f"  • Attributes have different types: ✓ (string, integer, float)")
 
@@ -333,6 +508,20 @@ def main():
     print("="*60)
     
     csv_file = "/Users/andrei.napruiu/Desktop/SDR/Laboratoare-SDR/Lab1/movies-QueryResult.csv"
+    
+    # Non-interactive commands skip the analysis and load only the columns the payloads need
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in ('upload', 'export'):
+        analyzer = MovieDatasetAnalyzer(csv_file, columns=UPLOAD_COLUMNS)
+        if command == 'upload':
+            analyzer.send_attributes_to_recombee()
+        else:
+            analyzer.export_payloads()
+        return
+    if command is not None:
+        print(f"❌ Unknown command {command!r} (expected 'upload' or 'export')")
+        sys.exit(2)
+    
     analyzer = MovieDatasetAnalyzer(csv_file)
     
     analyzer.analyze_dataset()
@@ -346,8 +535,9 @@ def main():
     print("1. Send to Recombee (to add more properties to your items)")
     print("2. Send to demo API (httpbin.org/post)")
     print("3. Skip API calls")
+    print("4. Export Recombee payloads to a file (upload later with replay_payloads.py)")
     
-    choice = input("\nEnter your choice (1/2/3): ").strip()
+    choice = input("\nEnter your choice (1/2/3/4): ").strip()
     
     if choice == "1":
         if os.path.exists('.env'):
@@ -384,6 +574,8 @@ def main():
             analyzer.send_attributes_to_api()
         else:
             print("Skipping demo API call.")
+    elif choice == "4":
+        analyzer.export_payloads()
     else:
         print("Skipping all API calls.")
     
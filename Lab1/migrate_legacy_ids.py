@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+One-off migration: delete the row-numbered items left by old uploads.
+
+Uploads made before items were keyed by imdb_title_id used the 1-based row
+number of the CSV as item id ("1", "2", ...), so a database filled by both
+schemes holds every movie twice. This script fetches items "1".."rows" and
+selects only those whose stored title (and year) match the movie at that
+row of the catalog; unrelated items that happen to have a numeric id are
+left alone. Without --delete it only reports what it found.
+
+Credentials and upload settings are read from the same environment
+variables (.env) as lab1.py.
+
+Usage:
+    python3 migrate_legacy_ids.py [--csv movies-QueryResult.csv] [--delete]
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List
+
+import pandas as pd
+from dotenv import load_dotenv
+from recombee_api_client.api_requests import Batch, DeleteItem, GetItemValues
+
+from batch_uploader import BatchUploader, chunked
+from recombee_client import create_recombee_client
+
+MATCH_COLUMNS = ['title', 'year']
+
+
+def _matches(stored: Dict, movie: pd.Series) -> bool:
+    for col in MATCH_COLUMNS:
+        if pd.isna(movie[col]):
+            continue
+        if str(stored.get(col)) != str(movie[col]):
+            return False
+    return True
+
+
+def find_legacy_ids(client, catalog: pd.DataFrame, batch_size: int = 100) -> List[str]:
+    """Row-number ids whose stored values are the movie at that row of `catalog`."""
+    legacy_ids = []
+    for rows in chunked(range(len(catalog)), batch_size):
+        responses = client.send(Batch([GetItemValues(str(row + 1)) for row in rows]))
+        for row, response in zip(rows, responses):
+            if response.get('code') == 200 and _matches(response.get('json') or {}, catalog.iloc[row]):
+                legacy_ids.append(str(row + 1))
+    return legacy_ids
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=os.getenv('CSV_PATH', 'movies-QueryResult.csv'))
+    parser.add_argument("--delete", action="store_true", help="delete the items found (default: only report them)")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv('RECOMBEE_BATCH_SIZE', '100')))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv('RECOMBEE_CONCURRENCY', '4')))
+    parser.add_argument("--max-retries", type=int, default=int(os.getenv('RECOMBEE_MAX_RETRIES', '3')))
+    args = parser.parse_args()
+
+    database_id = os.getenv('RECOMBEE_DATABASE_ID')
+    token = os.getenv('RECOMBEE_SECRET_TOKEN')
+    if not all([database_id, token]):
+        print("❌ Missing Recombee credentials! Set RECOMBEE_DATABASE_ID and RECOMBEE_SECRET_TOKEN (see env_example.txt)")
+        sys.exit(1)
+
+    try:
+        catalog = pd.read_csv(args.csv, usecols=MATCH_COLUMNS)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print("="*60)
+    print("MIGRATING ROW-NUMBERED ITEM IDS")
+    print("="*60)
+    print(f"✓ Catalog: {args.csv} ({len(catalog)} movies)")
+    print(f"✓ Database ID: {database_id}")
+
+    client = create_recombee_client(database_id, token)
+    legacy_ids = find_legacy_ids(client, catalog, args.batch_size)
+    if not legacy_ids:
+        print("✓ No row-numbered items from older uploads found")
+        return
+    print(f"⚠️  {len(legacy_ids)} items are keyed by row number and duplicate a movie now keyed by imdb_title_id")
+    if not args.delete:
+        print("   Run again with --delete to remove them.")
+        return
+
+    deleter = BatchUploader(
+        client,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        request_factory=lambda item: DeleteItem(item["item_id"])
+    )
+    report = deleter.upload({"item_id": item_id} for item_id in legacy_ids)
+    report.print_summary()
+    sys.exit(1 if report.failed_items else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+"Similar movies" from catalog metadata.
+
+The comma-separated `genre`, `director`, `actors`, `country` and `language`
+fields are multi-hot encoded into one sparse matrix (optionally IDF weighted,
+then L2-normalized). Cosine similarities are computed one block of rows at a
+time and only the top-k neighbors per movie are kept, so memory stays at
+O(block_size * N + N * k) instead of a dense N x N matrix.
+
+Values shared by many movies ("Drama", "USA") are multiplied as a small dense
+matrix with BLAS, the rare ones (directors, actors) as a sparse matrix. Pairs
+that share a rare value give each row a lower bound on its k-th best score,
+so the top-k is picked with one comparison pass instead of a full sort.
+
+Building the table for 85,000 movies (the CSV repeated) takes 45-60 s on a
+single core; more --workers threads split the blocks between cores.
+test_movie_similarity.py checks the neighbors against brute-force
+cosine_similarity.
+
+Usage:
+    python3 movie_similarity.py [--csv movies-QueryResult.csv] [--k 10] [--title "Metropolis"]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+# Metadata fields and their weight in the combined vector
+SIMILARITY_FIELDS = {
+    'genre': 1.0,
+    'director': 1.0,
+    'actors': 1.0,
+    'country': 0.5,
+    'language': 0.5,
+}
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def _split_values(text: str):
+    return [value.strip() for value in text.split(',') if value.strip()]
+
+
+def encode_metadata(df: pd.DataFrame, fields: Dict[str, float] = None,
+                    idf: bool = True) -> sparse.csr_matrix:
+    """Multi-hot encode the comma-separated fields into one L2-normalized CSR matrix."""
+    fields = fields or SIMILARITY_FIELDS
+    blocks = []
+    for field, weight in fields.items():
+        if field not in df.columns:
+            continue
+        vectorizer = CountVectorizer(tokenizer=_split_values, token_pattern=None,
+                                     lowercase=False, binary=True, dtype=np.float32)
+        encoded = vectorizer.fit_transform(df[field].fillna('').astype(str)).tocsc()
+        if idf:
+            # Rare values (a niche director) say more than common ones ("Drama")
+            doc_freq = np.diff(encoded.indptr)
+            encoded = encoded @ sparse.diags(np.log((1 + len(df)) / (1 + doc_freq)).astype(np.float32) + 1)
+        blocks.append(encoded.tocsr() * weight)
+    if not blocks:
+        raise ValueError(f"None of the similarity fields {list(fields)} are in the dataset")
+    return normalize(sparse.hstack(blocks, format='csr'), norm='l2', copy=False)
+
+
+def split_by_frequency(matrix: sparse.csr_matrix, dense_min_df: Optional[int] = None):
+    """
+    Split the columns into a dense part (values shared by many movies, e.g.
+    "Drama" or "USA") and a sparse part (directors, actors, rare values).
+
+    Products of the frequent columns are nearly dense, so they are cheaper as
+    a BLAS matmul; the rare columns stay sparse and cheap to multiply.
+    """
+    if dense_min_df is None:
+        dense_min_df = max(256, matrix.shape[0] // 100)
+    columns = matrix.tocsc()
+    frequent = np.diff(columns.indptr) > dense_min_df
+    dense_part = np.ascontiguousarray(columns[:, frequent].toarray())
+    sparse_part = columns[:, ~frequent].tocsr()
+    return dense_part, sparse_part
+
+
+def _rows_top_k(block: np.ndarray, k: int):
+    """Exact top-k per row by argpartition over the whole row."""
+    candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(block, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return (np.take_along_axis(candidates, order, axis=1),
+            np.take_along_axis(candidate_scores, order, axis=1))
+
+
+def _thresholded_top_k(block: np.ndarray, k: int, floor: np.ndarray):
+    """
+    Exact top-k per row, looking only at scores >= the row's `floor`.
+
+    `floor` must be a lower bound of each row's k-th best score; one
+    comparison pass then replaces a full argpartition of every row.
+    """
+    n_rows, n_cols = block.shape
+    passed = (block >= floor[:, None]).ravel()
+    padding = -passed.size % 8
+    if padding:
+        passed = np.concatenate([passed, np.zeros(padding, dtype=bool)])
+    # Few scores pass: scan the mask 8 bytes at a time, then expand the hits
+    words = np.flatnonzero(passed.view(np.uint64))
+    positions = (words[:, None] * 8 + np.arange(8)).ravel()
+    positions = positions[passed[positions]]
+    rows, cols = np.divmod(positions, n_cols)
+    values = block[rows, cols]
+
+    order = np.lexsort((-values, rows))
+    rows, cols, values = rows[order], cols[order], values[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, np.arange(n_rows))[rows]
+    keep = rank < k
+
+    candidates = np.zeros((n_rows, k), dtype=np.int64)
+    candidate_scores = np.zeros((n_rows, k), dtype=block.dtype)
+    candidates[rows[keep], rank[keep]] = cols[keep]
+    candidate_scores[rows[keep], rank[keep]] = values[keep]
+    return candidates, candidate_scores
+
+
+def _block_top_k(dense_part: np.ndarray, dense_t: np.ndarray, sparse_part: sparse.csr_matrix,
+                 sparse_t: sparse.csc_matrix, start: int, stop: int, k: int):
+    n_block = stop - start
+    block = dense_part[start:stop] @ dense_t
+    rare = (sparse_part[start:stop] @ sparse_t).tocoo()
+    block[rare.row, rare.col] += rare.data
+    block[np.arange(n_block), np.arange(start, stop)] = -1.0  # never your own neighbor
+
+    # Pairs sharing a rare value have exact scores in `block`; the k-th best
+    # of them bounds the row's k-th best overall from below
+    shared = rare.col != rare.row + start
+    rows = rare.row[shared]
+    values = block[rows, rare.col[shared]]
+    order = np.lexsort((-values, rows))
+    rows, values = rows[order], values[order]
+    first = np.searchsorted(rows, np.arange(n_block))
+    has_floor = np.bincount(rows, minlength=n_block) >= k
+    floor = np.full(n_block, np.inf, dtype=block.dtype)
+    floor[has_floor] = values[first[has_floor] + k - 1]
+
+    candidates, candidate_scores = _thresholded_top_k(block, k, floor)
+    if not has_floor.all():
+        candidates[~has_floor], candidate_scores[~has_floor] = _rows_top_k(block[~has_floor], k)
+
+    valid = candidate_scores > 0
+    return np.where(valid, candidates, -1), np.where(valid, candidate_scores, 0.0)
+
+
+def top_k_neighbors(matrix: sparse.csr_matrix, k: int = 10, block_size: int = 512,
+                    dense_min_df: Optional[int] = None, workers: int = DEFAULT_WORKERS):
+    """
+    Top-k cosine neighbors of every row of an L2-normalized sparse matrix.
+
+    Returns (neighbors, scores) arrays of shape (N, k), best first; rows with
+    fewer than k non-zero similarities are padded with -1 / 0. Each of the
+    `workers` threads holds one block_size x N float32 score block.
+    """
+    n_rows = matrix.shape[0]
+    k = min(k, n_rows - 1)
+    neighbors = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+    if k < 1:
+        return neighbors, scores
+    dense_part, sparse_part = split_by_frequency(matrix, dense_min_df)
+    dense_t = np.ascontiguousarray(dense_part.T)
+    sparse_t = sparse_part.T.tocsc()
+
+    def fill(start: int):
+        stop = min(start + block_size, n_rows)
+        neighbors[start:stop], scores[start:stop] = _block_top_k(
+            dense_part, dense_t, sparse_part, sparse_t, start, stop, k)
+
+    # Matmuls, comparisons and sorts release the GIL, so blocks overlap well in threads
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(fill, range(0, n_rows, block_size)))
+    return neighbors, scores
+
+
+class MovieSimilarityIndex:
+    def __init__(self, item_ids: np.ndarray, titles: np.ndarray,
+                 neighbors: np.ndarray, scores: np.ndarray):
+        self.item_ids = item_ids
+        self.titles = titles
+        self.neighbors = neighbors
+        self.scores = scores
+        self._positions = {item_id: pos for pos, item_id in enumerate(item_ids)}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, k: int = 10, block_size: int = 512,
+              fields: Dict[str, float] = None, idf: bool = True,
+              id_column: str = 'imdb_title_id', workers: int = DEFAULT_WORKERS) -> "MovieSimilarityIndex":
+        matrix = encode_metadata(df, fields, idf)
+        neighbors, scores = top_k_neighbors(matrix, k, block_size, workers=workers)
+        item_ids = df[id_column].astype(str).to_numpy() if id_column in df.columns \
+            else (df.index + 1).astype(str).to_numpy()
+        return cls(item_ids, df['title'].astype(str).to_numpy(), neighbors, scores)
+
+    def similar(self, item_id: str, k: Optional[int] = None) -> pd.DataFrame:
+        pos = self._positions[item_id]
+        row_neighbors = self.neighbors[pos][:k]
+        row_scores = self.scores[pos][:k]
+        keep = row_neighbors >= 0
+        row_neighbors, row_scores = row_neighbors[keep], row_scores[keep]
+        return pd.DataFrame({
+            'imdb_title_id': self.item_ids[row_neighbors],
+            'title': self.titles[row_neighbors],
+            'similarity': row_scores,
+        })
+
+    def find(self, title: str) -> str:
+        matches = np.flatnonzero(pd.Series(self.titles).str.lower() == title.lower())
+        if len(matches) == 0:
+            raise KeyError(f"No movie titled {title!r}")
+        return self.item_ids[matches[0]]
+
+    def save(self, path: str):
+        # Fixed-width strings, so load() does not need to unpickle object arrays
+        np.savez_compressed(path, item_ids=self.item_ids.astype(str), titles=self.titles.astype(str),
+                            neighbors=self.neighbors, scores=self.scores)
+
+    @classmethod
+    def load(cls, path: str) -> "MovieSimilarityIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['item_ids'], data['titles'], data['neighbors'], data['scores'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="movies-QueryResult.csv")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-idf", action="store_true", help="plain multi-hot, no IDF weighting")
+    parser.add_argument("--title", help="print the neighbors of this movie")
+    parser.add_argument("--output", help="save the neighbor table to this .npz file")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, usecols=['imdb_title_id', 'title', *SIMILARITY_FIELDS])
+    start = time.perf_counter()
+    index = MovieSimilarityIndex.build(df, k=args.k, block_size=args.block_size, idf=not args.no_idf,
+                                       workers=args.workers)
+    print(f"✓ Built top-{index.neighbors.shape[1]} neighbors for {len(df):,} movies "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    if args.output:
+        index.save(args.output)
+        print(f"✓ Saved neighbor table to {args.output}")
+
+    title = args.title or df['title'].iloc[0]
+    print(f"\nMovies similar to {title!r}:")
+    print(index.similar(index.find(title)).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Gzip-compressed NDJSON files of prepared Recombee item payloads.
+
+The first line is a header with the item property schema; every following
+line is one {"item_id", "properties"} payload. Files are written and read
+as streams, so neither side holds the catalog in memory, and reading needs
+nothing but the standard library.
+"""
+
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FORMAT = "recombee-item-payloads"
+VERSION = 1
+
+
+def payloads_path_for(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".payloads.ndjson.gz"
+
+
+def write_payloads(path: str, items: Iterable[Dict[str, Any]],
+                   properties: List[Tuple[str, str]], compresslevel: int = 6) -> int:
+    """Stream `items` to `path`; returns the number of payloads written."""
+    count = 0
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=compresslevel) as f:
+        header = {"format": FORMAT, "version": VERSION, "properties": [list(p) for p in properties]}
+        f.write(json.dumps(header) + "\n")
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    # Readers never see a half-written file
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return _parse_header(f.readline(), path)
+
+
+def _parse_header(line: str, path: str) -> Dict[str, Any]:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a Recombee payload file")
+    if header.get("version") != VERSION:
+        raise ValueError(f"{path} has unsupported payload file version {header.get('version')}")
+    header["properties"] = [tuple(p) for p in header.get("properties", [])]
+    return header
+
+
+def read_payloads(path: str, shard: int = 0, shards: int = 1,
+                  item_ids: Optional[set] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the payloads stored in `path`.
+
+    With `shards` > 1 only every shards-th payload (starting at `shard`) is
+    yielded, so several replay workers can split one file between them.
+    `item_ids` restricts the replay to those items, e.g. the ones that failed.
+    """
+    if not 0 <= shard < shards:
+        raise ValueError("shard must be in [0, shards)")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        _parse_header(f.readline(), path)
+        for line_num, line in enumerate(f):
+            if line_num % shards != shard or not line.strip():
+                continue
+            item = json.loads(line)
+            if item_ids is None or item["item_id"] in item_ids:
+                yield item
@@ -0,0 +1,35 @@
+"""
+RecombeeClient factory.
+
+By default the client talks to the EU_WEST Recombee cluster. Setting
+RECOMBEE_BASE_URI (and RECOMBEE_PROTOCOL=http) points it somewhere else,
+for example at the local stand-in server in fake_recombee.py.
+"""
+
+import os
+
+from recombee_api_client.api_client import RecombeeClient, Region
+from recombee_api_client.api_requests import Request
+
+
+class PlainHttpRecombeeClient(RecombeeClient):
+    """
+    Client that never upgrades requests to HTTPS.
+
+    Some requests (notably `Batch`) force HTTPS regardless of the client's
+    protocol, which a plain-HTTP local server cannot answer.
+    """
+
+    def send(self, request: Request):
+        request.ensure_https = False
+        return super().send(request)
+
+
+def create_recombee_client(database_id: str, token: str, region: Region = Region.EU_WEST) -> RecombeeClient:
+    base_uri = os.getenv('RECOMBEE_BASE_URI', '').strip()
+    if not base_uri:
+        return RecombeeClient(database_id, token, region=region)
+
+    protocol = os.getenv('RECOMBEE_PROTOCOL', 'https').strip().lower()
+    client_class = PlainHttpRecombeeClient if protocol == 'http' else RecombeeClient
+    return client_class(database_id, token, protocol=protocol, options={'base_uri': base_uri})
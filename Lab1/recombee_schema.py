@@ -0,0 +1,147 @@
+"""
+Item property schema management for Recombee.
+
+The existing properties are fetched once and cached in a local JSON file
+with a TTL. Only the missing properties are created, all in a single
+`Batch`, and properties that exist with a different type are reported
+instead of being silently ignored. (Lab2's user_schema.py does the same
+for the user properties of the user import.)
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from recombee_api_client.api_requests import AddItemProperty, Batch, ListItemProperties
+
+
+@dataclass
+class SchemaReport:
+    existing: List[str] = field(default_factory=list)
+    created: List[str] = field(default_factory=list)
+    mismatched: List[Tuple[str, str, str]] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+    round_trips: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatched and not self.failed
+
+    def print_summary(self):
+        source = "local cache" if self.from_cache else "Recombee"
+        print(f"✓ Item schema checked against {source} "
+              f"({self.round_trips} round trip{'s' if self.round_trips != 1 else ''})")
+        print(f"  • Already present: {len(self.existing)}")
+        for name in self.created:
+            print(f"✓ Created property: {name}")
+        for name, expected, actual in self.mismatched:
+            print(f"⚠️  Property {name} exists as '{actual}', expected '{expected}'")
+        for name, error in self.failed.items():
+            print(f"❌ Could not create property {name}: {error}")
+
+
+class SchemaManager:
+    # Recorded in the cache file, next to the database id
+    kind = 'item'
+
+    def __init__(self, client, cache_path: Optional[str] = None,
+                 ttl: float = 3600, database_id: Optional[str] = None):
+        self.client = client
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.database_id = database_id or getattr(client, 'database_id', None)
+        self._properties: Optional[Dict[str, str]] = None
+
+    def _read_cache(self) -> Optional[Dict[str, str]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('database_id') != self.database_id or data.get('kind') != self.kind:
+            return None
+        if time.time() - data.get('fetched_at', 0) > self.ttl:
+            return None
+        return data.get('properties', {})
+
+    def _write_cache(self, properties: Dict[str, str]):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'database_id': self.database_id,
+                'kind': self.kind,
+                'fetched_at': time.time(),
+                'properties': properties
+            }, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def fetch(self, report: Optional[SchemaReport] = None, refresh: bool = False) -> Dict[str, str]:
+        """Existing properties as {name: type}, from the cache when it is fresh."""
+        if not refresh:
+            if self._properties is not None:
+                return self._properties
+            cached = self._read_cache()
+            if cached is not None:
+                if report:
+                    report.from_cache = True
+                self._properties = cached
+                return cached
+
+        response = self.client.send(ListItemProperties())
+        if report:
+            report.round_trips += 1
+        self._properties = {prop['name']: prop['type'] for prop in response}
+        self._write_cache(self._properties)
+        return self._properties
+
+    def ensure(self, properties: List[Tuple[str, str]]) -> SchemaReport:
+        """Make sure every (name, type) exists, creating the missing ones in one batch."""
+        report = SchemaReport()
+        existing = self.fetch(report)
+
+        missing = []
+        for name, prop_type in properties:
+            if name not in existing:
+                missing.append((name, prop_type))
+            elif existing[name] != prop_type:
+                report.mismatched.append((name, prop_type, existing[name]))
+            else:
+                report.existing.append(name)
+
+        if not missing:
+            return report
+
+        responses = self.client.send(Batch([AddItemProperty(name, prop_type) for name, prop_type in missing]))
+        report.round_trips += 1
+
+        conflict = False
+        for (name, prop_type), response in zip(missing, responses):
+            code = response.get('code', 200)
+            if code < 400:
+                report.created.append(name)
+                existing[name] = prop_type
+            elif code == 409:
+                # Created since the cache was written: look at its real type below
+                conflict = True
+            else:
+                report.failed[name] = f"HTTP {code}: {response.get('json')}"
+
+        if conflict:
+            existing = self.fetch(report, refresh=True)
+            for name, prop_type in missing:
+                if name in report.created or name in report.failed:
+                    continue
+                if existing.get(name) == prop_type:
+                    report.existing.append(name)
+                else:
+                    report.mismatched.append((name, prop_type, existing.get(name, 'missing')))
+        else:
+            self._write_cache(existing)
+        return report
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Upload prepared item payloads from an NDJSON export to Recombee.
+
+Replays a file written by `MovieDatasetAnalyzer.export_payloads` without
+pandas or the CSV: the payloads are streamed from disk straight into the
+batch uploader. Several workers can split one file with --shard/--shards,
+and items that still fail can be written to a new file to retry later.
+
+Credentials and upload settings are read from the same environment
+variables (.env) as lab1.py.
+
+Usage:
+    python3 replay_payloads.py movies-QueryResult.payloads.ndjson.gz
+                               [--shard 0 --shards 4] [--failed-output failed.ndjson.gz]
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from batch_uploader import AdaptiveBatchSizer, BatchUploader
+from payload_store import read_header, read_payloads, write_payloads
+from recombee_client import create_recombee_client
+from recombee_schema import SchemaManager
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, 'false').strip().lower() in ('1', 'true', 'yes')
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="payload file written by export_payloads")
+    parser.add_argument("--shard", type=int, default=0, help="0-based index of this worker")
+    parser.add_argument("--shards", type=int, default=1, help="number of workers sharing the file")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv('RECOMBEE_BATCH_SIZE', '100')))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv('RECOMBEE_CONCURRENCY', '4')))
+    parser.add_argument("--max-retries", type=int, default=int(os.getenv('RECOMBEE_MAX_RETRIES', '3')))
+    parser.add_argument("--adaptive", action="store_true", default=_env_flag('RECOMBEE_ADAPTIVE_BATCHING'))
+    parser.add_argument("--skip-schema", action="store_true",
+                        help="do not check or create the item properties listed in the file")
+    parser.add_argument("--failed-output", help="write the payloads that still failed to this file")
+    parser.add_argument("--quiet", action="store_true", help="no per-batch output")
+    args = parser.parse_args()
+
+    database_id = os.getenv('RECOMBEE_DATABASE_ID')
+    token = os.getenv('RECOMBEE_SECRET_TOKEN')
+    if not all([database_id, token]):
+        print("❌ Missing Recombee credentials! Set RECOMBEE_DATABASE_ID and RECOMBEE_SECRET_TOKEN (see env_example.txt)")
+        sys.exit(1)
+
+    try:
+        header = read_header(args.path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print("="*60)
+    print("REPLAYING ITEM PAYLOADS")
+    print("="*60)
+    print(f"✓ Payload file: {args.path}")
+    if args.shards > 1:
+        print(f"✓ Shard {args.shard + 1} of {args.shards}")
+    print(f"✓ Database ID: {database_id}")
+
+    client = create_recombee_client(database_id, token)
+    if not args.skip_schema:
+        schema = SchemaManager(
+            client,
+            cache_path=os.path.join(os.path.dirname(os.path.abspath(args.path)),
+                                    f'.recombee_schema.{database_id}.item.json'),
+            ttl=int(os.getenv('RECOMBEE_SCHEMA_TTL', '3600')),
+            database_id=database_id
+        )
+        schema_report = schema.ensure(header['properties'])
+        schema_report.print_summary()
+
+    uploader = BatchUploader(
+        client,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        verbose=not args.quiet,
+        sizer=AdaptiveBatchSizer(
+            initial_size=args.batch_size,
+            max_bytes=int(os.getenv('RECOMBEE_MAX_BATCH_BYTES', '1000000')),
+            target_latency=int(os.getenv('RECOMBEE_TARGET_LATENCY_MS', '1000')) / 1000
+        ) if args.adaptive else None
+    )
+    try:
+        report = uploader.upload(read_payloads(args.path, args.shard, args.shards))
+    except Exception as e:
+        # Not retryable (bad credentials, rejected request): every batch would fail the same way
+        print(f"❌ Upload stopped: {e}")
+        sys.exit(1)
+    report.print_summary()
+
+    if args.failed_output and report.failed_items:
+        failed = read_payloads(args.path, args.shard, args.shards, item_ids=set(report.failed_items))
+        written = write_payloads(args.failed_output, failed, header['properties'])
+        print(f"✓ Wrote {written} failed payloads to {args.failed_output} (replay it to retry)")
+
+    sys.exit(1 if report.failed_items else 0)
+
+
+if __name__ == "__main__":
+    main()
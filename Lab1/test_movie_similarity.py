@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+from movie_similarity import SIMILARITY_FIELDS, MovieSimilarityIndex, encode_metadata, top_k_neighbors
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'movies-QueryResult.csv')
+
+
+@pytest.fixture(scope='module')
+def movies():
+    return pd.read_csv(CSV_PATH, usecols=['imdb_title_id', 'title', *SIMILARITY_FIELDS])
+
+
+def brute_force_top_k(matrix, k):
+    similarity = cosine_similarity(matrix)
+    np.fill_diagonal(similarity, -1.0)
+    best = -np.sort(-similarity, axis=1)[:, :k]
+    return similarity, np.where(best > 0, best, 0.0)
+
+
+@pytest.mark.parametrize('block_size, dense_min_df', [(512, None), (97, 5)])
+def test_top_k_matches_brute_force(movies, block_size, dense_min_df):
+    k = 10
+    matrix = encode_metadata(movies)
+    similarity, expected = brute_force_top_k(matrix, k)
+
+    neighbors, scores = top_k_neighbors(matrix, k, block_size, dense_min_df=dense_min_df)
+
+    np.testing.assert_allclose(scores, expected, atol=1e-5)
+    rows = np.arange(len(movies))[:, None]
+    found = neighbors >= 0
+    assert (found == (scores > 0)).all()
+    assert (neighbors != rows).all()
+    # Ties may be broken differently; the score of every listed neighbor must still be exact
+    np.testing.assert_allclose(similarity[np.broadcast_to(rows, neighbors.shape)[found], neighbors[found]],
+                               scores[found], atol=1e-5)
+
+
+def test_index_similar_lists_neighbors_by_imdb_id(movies, tmp_path):
+    index = MovieSimilarityIndex.build(movies.head(200), k=5)
+    path = str(tmp_path / 'neighbors.npz')
+    index.save(path)
+    loaded = MovieSimilarityIndex.load(path)
+
+    item_id = movies['imdb_title_id'].iloc[0]
+    similar = loaded.similar(item_id)
+    assert len(similar) <= 5
+    assert item_id not in similar['imdb_title_id'].tolist()
+    assert similar['similarity'].is_monotonic_decreasing
+    assert loaded.find(movies['title'].iloc[0]) == item_id
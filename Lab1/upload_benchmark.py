@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Upload throughput benchmark against the local fake Recombee server.
+
+Runs send_attributes_to_recombee (Lab1) and the send stage of the Lab2
+UserImporter for every combination of batch size and concurrency, against
+fake_recombee.py with configurable latency, error rate and rate limit.
+Reports items/sec and p50/p99 batch latency per configuration.
+
+Usage:
+    python3 upload_benchmark.py [--rows 20000] [--users 20000] [--batch-sizes 50,100,500]
+                                [--concurrency 1,4,8] [--latency 0.02]
+                                [--error-rate 0.0] [--rate-limit 0]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from benchmark_payloads import scale_dataset
+from fake_recombee import FakeRecombeeServer
+from lab1 import RECOMBEE_ITEM_PROPERTIES, UPLOAD_COLUMNS, MovieDatasetAnalyzer
+
+LAB2_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Lab2")
+# Appended, so Lab1's own modules keep priority
+sys.path.append(LAB2_DIR)
+
+from user_importer import UserImporter, build_user_values  # noqa: E402
+
+
+def _serve(port: int, latency: float, per_request_latency: float, error_rate: float, rate_limit: float):
+    server = FakeRecombeeServer(port=port, latency=latency, per_request_latency=per_request_latency,
+                                error_rate=error_rate, rate_limit=rate_limit or None)
+    server.httpd.serve_forever()
+
+
+def start_server(args) -> multiprocessing.Process:
+    # A separate process, so the server does not compete for the client's GIL
+    process = multiprocessing.Process(
+        target=_serve,
+        args=(args.port, args.latency, args.per_request_latency, args.error_rate, args.rate_limit),
+        daemon=True
+    )
+    process.start()
+    for _ in range(50):
+        try:
+            requests.get(f"http://127.0.0.1:{args.port}/_stats", timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("Fake Recombee server did not start")
+
+
+def percentile_ms(values, q) -> str:
+    return f"{np.percentile(values, q) * 1000:.1f}" if values else "-"
+
+
+def bench_movies(analyzer: MovieDatasetAnalyzer, batch_size: int, concurrency: int):
+    analyzer.recombee_batch_size = batch_size
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        report = analyzer.send_attributes_to_recombee("bench", "bench", concurrency=concurrency)
+    if report is None:
+        # send_attributes_to_recombee prints its error and returns None
+        errors = [line for line in output.getvalue().splitlines() if line.startswith("❌")]
+        print(f"{batch_size:>6} {concurrency:>5}  upload failed: {errors[-1] if errors else 'no report'}")
+    return report
+
+
+def prepare_users(users_csv: str, rows: int, workdir: str):
+    """
+    Scale the users CSV to `rows` rows and build every user once.
+
+    Returns the importer, its (user id, values) pairs and the inferred
+    schema; only the send stage is timed, like the movie upload.
+    """
+    df = pd.read_csv(users_csv, dtype=str)
+    path = os.path.join(workdir, "users.csv")
+    df.iloc[np.arange(rows) % len(df)].to_csv(path, index=False)
+    importer = UserImporter(database_id="bench", token="bench", csv_path=path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        frame = importer.prepare(importer.load())
+        prop_map = importer.property_map(frame)
+        schema_types = importer.infer_schema(frame, prop_map)
+        users = list(zip(importer.assign_ids(frame),
+                         build_user_values(frame, prop_map, schema_types)))
+    return importer, users, schema_types
+
+
+def bench_users(importer: UserImporter, users, batch_size: int, concurrency: int):
+    importer.batch_size = batch_size
+    importer.concurrency = concurrency
+    with contextlib.redirect_stdout(io.StringIO()):
+        report, _ = importer.send(users)
+    return report
+
+
+def print_row(batch_size: int, concurrency: int, items_per_second: float,
+              latencies, retries: int, failed: int):
+    print(f"{batch_size:>6} {concurrency:>5} {items_per_second:>10,.0f} "
+          f"{percentile_ms(latencies, 50):>8} {percentile_ms(latencies, 99):>8} "
+          f"{retries:>8} {failed:>7}")
+
+
+HEADER = f"{'batch':>6} {'conc':>5} {'items/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'retries':>8} {'failed':>7}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="movies-QueryResult.csv")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--users-csv", default=os.path.join(LAB2_DIR, "people.csv"))
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--batch-sizes", default="50,100,500")
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--per-request-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    args = parser.parse_args()
+
+    batch_sizes = [int(x) for x in args.batch_sizes.split(",")]
+    concurrencies = [int(x) for x in args.concurrency.split(",")]
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    os.environ.update({
+        "RECOMBEE_BASE_URI": f"127.0.0.1:{args.port}",
+        "RECOMBEE_PROTOCOL": "http",
+        "RECOMBEE_DATABASE_ID": "bench",
+        "RECOMBEE_SECRET_TOKEN": "bench",
+        "RECOMBEE_SYNC_MODE": "full",
+    })
+    server = start_server(args)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = MovieDatasetAnalyzer(args.csv, columns=UPLOAD_COLUMNS)
+        analyzer.df = scale_dataset(analyzer.df, args.rows)
+
+        print(f"Fake server: latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.1%}, "
+              f"rate limit {args.rate_limit or 'none'}")
+        print(f"\nLab1 movie upload ({len(analyzer.df):,} items)")
+        print(HEADER)
+        for batch_size in batch_sizes:
+            for concurrency in concurrencies:
+                requests.post(f"{base_url}/_reset")
+                # Seed the schema so injected errors only hit the measured uploads
+                requests.post(f"{base_url}/_schema/items", json=dict(RECOMBEE_ITEM_PROPERTIES))
+                report = bench_movies(analyzer, batch_size, concurrency)
+                if report is not None:
+                    print_row(batch_size, concurrency, report.items_per_second,
+                              report.batch_latencies, report.retries, len(report.failed_items))
+
+        with tempfile.TemporaryDirectory() as workdir:
+            importer, users, schema_types = prepare_users(args.users_csv, args.users, workdir)
+            print(f"\nLab2 user import ({len(users):,} users from {args.users_csv})")
+            print(HEADER)
+            for batch_size in batch_sizes:
+                for concurrency in concurrencies:
+                    requests.post(f"{base_url}/_reset")
+                    requests.post(f"{base_url}/_schema/users", json=schema_types)
+                    report = bench_users(importer, users, batch_size, concurrency)
+                    rate = report.sent / report.elapsed if report.elapsed > 0 else 0.0
+                    print_row(batch_size, concurrency, rate, report.batch_latencies,
+                              report.retries, len(report.failed))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from recombee_api_client.api_requests import Batch, Request
+
+# Status codes inside a batch response that are worth another attempt
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class SendReport:
+    """Outcome of a batched send, with one entry per failed request."""
+
+    def __init__(self):
+        self.sent = 0
+        self.round_trips = 0
+        self.retries = 0
+        self.failed: Dict[str, str] = {}
+        self.status_counts: Counter = Counter()
+        self.elapsed = 0.0
+        # Seconds taken by every Batch round trip, retries included
+        self.batch_latencies: List[float] = []
+
+    @property
+    def total(self) -> int:
+        return self.sent + len(self.failed)
+
+    def print_summary(self, label: str = "requests", max_failed: int = 10) -> None:
+        """Print totals, status codes and the first failures."""
+        rate = self.sent / self.elapsed if self.elapsed > 0 else 0.0
+        print(f"[{label}] {self.sent}/{self.total} ok in {self.round_trips} round trips "
+              f"({self.retries} retries, {self.elapsed:.2f}s, {rate:.0f}/s)")
+        codes = ", ".join(f"{code}: {n}" for code, n in sorted(self.status_counts.items(), key=str))
+        if codes:
+            print(f"[{label}] status codes: {codes}")
+        for key, error in list(self.failed.items())[:max_failed]:
+            print(f"[warn] {key} failed: {error}")
+        if len(self.failed) > max_failed:
+            print(f"[warn] ... and {len(self.failed) - max_failed} more failures")
+
+
+class BatchSender:
+    """Send requests in ``Batch`` calls through a bounded worker pool.
+
+    Whole batches that raise, and single requests that come back with a
+    retryable status, are retried with exponential backoff and full jitter.
+    Every other failure is recorded per request in the ``SendReport``.
+    ``on_sent`` receives the keys of every request that succeeded; statuses
+    in ``ok_codes`` (e.g. 404 for deletions) count as success too.
+    """
+
+    def __init__(self, client, batch_size: int = 100, concurrency: int = 4,
+                 max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 on_progress: Optional[Callable[[int], None]] = None,
+                 on_sent: Optional[Callable[[List[str]], None]] = None,
+                 ok_codes: Iterable[int] = ()):
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size and concurrency must be at least 1")
+        self.client = client
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_progress = on_progress
+        self.on_sent = on_sent
+        self.ok_codes = set(ok_codes)
+        self._lock = threading.Lock()
+
+    def send(self, keyed_requests: Iterable[Tuple[str, Request]]) -> SendReport:
+        """Send ``(key, request)`` pairs; keys identify failures in the report.
+
+        Args:
+            keyed_requests: Any iterable, including a generator; at most
+                2 * concurrency batches are materialized at a time.
+
+        Returns:
+            SendReport: Counts, retries and per-request failures.
+        """
+        report = SendReport()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = set()
+            for batch in self._chunks(keyed_requests):
+                if len(in_flight) >= 2 * self.concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(pool.submit(self._send_with_retry, batch, report))
+            for future in wait(in_flight)[0]:
+                future.result()
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _chunks(self, items: Iterable) -> Iterator[List]:
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, self.batch_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _send_with_retry(self, batch: List[Tuple[str, Request]], report: SendReport) -> None:
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            retry = self._send_once(pending, report)
+            if not retry:
+                return
+            if attempt == self.max_retries:
+                with self._lock:
+                    for (key, _), error in retry:
+                        report.failed[key] = error
+                return
+            with self._lock:
+                report.retries += 1
+            pending = [pair for pair, _ in retry]
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    def _send_once(self, batch: List[Tuple[str, Request]],
+                   report: SendReport) -> List[Tuple[Tuple[str, Request], str]]:
+        """Send one attempt; returns the requests worth retrying with their error."""
+        start = time.perf_counter()
+        try:
+            responses = self.client.send(Batch([request for _, request in batch]))
+        except Exception as e:
+            with self._lock:
+                report.round_trips += 1
+                report.batch_latencies.append(time.perf_counter() - start)
+                report.status_counts["exception"] += len(batch)
+            return [(pair, str(e)) for pair in batch]
+
+        retry = []
+        sent_keys = []
+        latency = time.perf_counter() - start
+        with self._lock:
+            report.round_trips += 1
+            report.batch_latencies.append(latency)
+            for pair, response in zip(batch, responses):
+                code = response.get("code", 200) if isinstance(response, dict) else 200
+                report.status_counts[code] += 1
+                if code < 400 or code in self.ok_codes:
+                    sent_keys.append(pair[0])
+                elif code in RETRYABLE_CODES:
+                    retry.append((pair, f"HTTP {code}: {response.get('json')}"))
+                else:
+                    report.failed[pair[0]] = f"HTTP {code}: {response.get('json')}"
+            report.sent += len(sent_keys)
+            total_sent = report.sent
+        if sent_keys and self.on_sent:
+            self.on_sent(sent_keys)
+        if sent_keys and self.on_progress:
+            self.on_progress(total_sent)
+        return retry
@@ -1,43 +1,203 @@
+"""Delete the users of a Recombee database.
+
+All matching user ids are listed first, ``--page-size`` at a time, and
+only then deleted with ``Batch`` requests over a bounded worker pool, so
+deletions never shift the pages being listed. The schema (user
+properties) is kept.
+
+Usage:
+    python3 delete_users.py [--dry-run] [--where team=Yummies] [--yes]
+"""
+
+import argparse
+import json
 import os
+import random
+import re
+import time
+from typing import List, Optional, Tuple
+
+import requests
 from dotenv import load_dotenv
-from recombee_api_client.api_client import RecombeeClient, Region
-from recombee_api_client.api_requests import ListUsers, DeleteUser
+from recombee_api_client.api_client import Region
+from recombee_api_client.api_requests import DeleteUser, ListUsers
 from recombee_api_client.exceptions import APIException
 
-load_dotenv()
+from batch_sender import BatchSender
+from recombee_connection import make_client
 
-DB_ID = os.getenv("RECOMBEE_DATABASE_ID")
-TOKEN = os.getenv("RECOMBEE_SECRET_TOKEN")
-REGION_STR = os.getenv("RECOMBEE_REGION", "EU_WEST").upper()
 
-if not DB_ID or not TOKEN:
-    raise SystemExit("Please set RECOMBEE_DATABASE_ID and "
-                     "RECOMBEE_SECRET_TOKEN in .env")
+def where_to_reql(condition: str) -> str:
+    """Turn a ``property=value`` condition into a ReQL filter.
 
-if REGION_STR not in ("EU_WEST", "US_WEST"):
-    raise SystemExit("RECOMBEE_REGION must be EU_WEST or US_WEST")
+    Args:
+        condition (str): E.g. ``team=Yummies`` or ``age=30``.
 
-client = RecombeeClient(DB_ID, TOKEN, region=getattr(Region, REGION_STR))
+    Returns:
+        str: E.g. ``'team' == "Yummies"``; numbers and true/false are
+        compared as such, everything else as a string.
+    """
+    prop, sep, value = condition.partition("=")
+    if not sep or not prop.strip():
+        raise ValueError(f"expected property=value, got {condition!r}")
+    value = value.strip()
+    if value in ("true", "false") or re.fullmatch(r"-?\d+(\.\d+)?", value):
+        literal = value
+    else:
+        literal = json.dumps(value)
+    return f"'{prop.strip()}' == {literal}"
 
-print(f"Connected to Recombee DB '{DB_ID}' ({REGION_STR})")
-confirm = input("⚠️ This will DELETE all users (properties/schema will "
-                "remain). Continue? (y/N): ").strip().lower()
-if confirm not in ("y", "yes"):
-    print("Aborted.")
-    raise SystemExit(0)
 
-try:
-    users = client.send(ListUsers())
-    print(f"Deleting {len(users)} users...")
-    deleted = 0
-    for user_id in users:
+def list_page(client, offset: int, count: int, reql_filter: Optional[str],
+              max_retries: int) -> List[str]:
+    """List one page of user ids, retrying failed calls with backoff.
+
+    Args:
+        client: Recombee client.
+        offset (int): Number of matching users to skip.
+        count (int): Page size.
+        reql_filter (Optional[str]): ReQL filter, or None for all users.
+        max_retries (int): Retries before the error is raised.
+
+    Returns:
+        List[str]: Up to ``count`` user ids.
+    """
+    filter_args = {"filter": reql_filter} if reql_filter else {}
+    for attempt in range(max_retries + 1):
         try:
-            client.send(DeleteUser(user_id))
-            deleted += 1
-            if deleted % 200 == 0:
-                print(f"Deleted {deleted} users...")
-        except APIException as e:
-            print(f"Failed deleting user {user_id}: {e}")
-    print(f"✅ Done. Deleted {deleted} users.")
-except APIException as e:
-    print(f"Could not list users: {e}")
+            return client.send(ListUsers(count=count, offset=offset, **filter_args))
+        except (APIException, requests.RequestException) as e:
+            if attempt == max_retries:
+                raise
+            delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+            print(f"[warn] listing users failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+    return []
+
+
+def list_user_ids(client, page_size: int, reql_filter: Optional[str],
+                  max_retries: int) -> Tuple[List[str], int]:
+    """List every matching user id once, before anything is deleted.
+
+    Pages are walked by offset over an unchanged listing. Ids already seen
+    are skipped, and the walk stops at a short page or at a page that
+    brings no new ids, so a listing that repeats users cannot loop.
+
+    Args:
+        client: Recombee client.
+        page_size (int): Users per ``ListUsers`` call.
+        reql_filter (Optional[str]): ReQL filter, or None for all users.
+        max_retries (int): Retries per page before the error is raised.
+
+    Returns:
+        Tuple[List[str], int]: The user ids in listing order and the
+        number of ``ListUsers`` calls.
+    """
+    user_ids: List[str] = []
+    seen = set()
+    offset = 0
+    calls = 0
+    while True:
+        page = list_page(client, offset, page_size, reql_filter, max_retries)
+        calls += 1
+        new_ids = [user_id for user_id in page if user_id not in seen]
+        seen.update(new_ids)
+        user_ids.extend(new_ids)
+        if not new_ids or len(page) < page_size:
+            return user_ids, calls
+        offset += len(page)
+        print(f"Listed {len(user_ids)} users...")
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only list the users that would be deleted")
+    parser.add_argument("--where", metavar="PROP=VALUE",
+                        help="only delete users whose property equals the value")
+    parser.add_argument("--filter", metavar="REQL", help="raw ReQL filter (overrides --where)")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int,
+                        default=int(os.getenv("RECOMBEE_BATCH_SIZE", "100")))
+    parser.add_argument("--concurrency", type=int,
+                        default=int(os.getenv("RECOMBEE_CONCURRENCY", "4")))
+    parser.add_argument("--max-retries", type=int,
+                        default=int(os.getenv("RECOMBEE_MAX_RETRIES", "3")))
+    parser.add_argument("--yes", action="store_true", help="do not ask for confirmation")
+    args = parser.parse_args()
+
+    db_id = os.getenv("RECOMBEE_DATABASE_ID")
+    token = os.getenv("RECOMBEE_SECRET_TOKEN")
+    region_str = os.getenv("RECOMBEE_REGION", "EU_WEST").upper()
+
+    if not db_id or not token:
+        raise SystemExit("Please set RECOMBEE_DATABASE_ID and "
+                         "RECOMBEE_SECRET_TOKEN in .env")
+
+    if region_str not in ("EU_WEST", "US_WEST"):
+        raise SystemExit("RECOMBEE_REGION must be EU_WEST or US_WEST")
+
+    try:
+        reql_filter = args.filter or (where_to_reql(args.where) if args.where else None)
+    except ValueError as e:
+        raise SystemExit(f"--where: {e}")
+
+    client = make_client(db_id, token, getattr(Region, region_str))
+
+    print(f"Connected to Recombee DB '{db_id}' ({region_str})")
+    target = f"users matching {reql_filter}" if reql_filter else "all users"
+    if args.dry_run:
+        print(f"Dry run: listing {target}, nothing is deleted")
+    elif not args.yes:
+        confirm = input(f"⚠️ This will DELETE {target} (properties/schema will "
+                        "remain). Continue? (y/N): ").strip().lower()
+        if confirm not in ("y", "yes"):
+            print("Aborted.")
+            raise SystemExit(0)
+
+    start = time.perf_counter()
+    try:
+        user_ids, round_trips = list_user_ids(client, args.page_size, reql_filter, args.max_retries)
+    except (APIException, requests.RequestException) as e:
+        raise SystemExit(f"Could not list users: {e}. Nothing was deleted.")
+
+    deleted = 0
+    failed = {}
+    if args.dry_run:
+        if user_ids:
+            print(f"First users: {', '.join(user_ids[:10])}")
+    elif user_ids:
+        def report_progress(sent: int) -> None:
+            if sent // args.page_size > (sent - args.batch_size) // args.page_size:
+                print(f"Deleted {sent} users...")
+
+        # A user that is already gone counts as deleted
+        sender = BatchSender(
+            client,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            max_retries=args.max_retries,
+            on_progress=report_progress,
+            ok_codes={404},
+        )
+        report = sender.send((user_id, DeleteUser(user_id)) for user_id in user_ids)
+        round_trips += report.round_trips
+        deleted = report.sent
+        failed = report.failed
+
+    elapsed = time.perf_counter() - start
+    if args.dry_run:
+        print(f"✅ Dry run done. {len(user_ids)} users would be deleted "
+              f"({round_trips} round trips, {elapsed:.2f}s).")
+        return
+    for user_id, error in list(failed.items())[:10]:
+        print(f"Failed deleting user {user_id}: {error}")
+    if len(failed) > 10:
+        print(f"... and {len(failed) - 10} more failures")
+    print(f"✅ Done. Deleted {deleted} users "
+          f"({len(failed)} failed, {round_trips} round trips, {elapsed:.2f}s).")
+
+
+if __name__ == "__main__":
+    main()
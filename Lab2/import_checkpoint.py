@@ -0,0 +1,56 @@
+import os
+import threading
+from typing import Iterable, Set
+
+
+class ImportCheckpoint:
+    """Append-only record of the user ids an import has already sent.
+
+    The first line identifies the import (database and key column); a file
+    written for another import is ignored. Every later line is one user id,
+    appended and flushed as soon as its batch succeeds, so an interrupted
+    import can skip them on the next run.
+    """
+
+    def __init__(self, path: str, signature: str):
+        self.path = path
+        self.signature = signature
+        self.done: Set[str] = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Set[str]:
+        """Read the ids completed by a previous run of the same import.
+
+        Returns:
+            Set[str]: The completed user ids (empty when there is no
+            matching checkpoint).
+        """
+        if not os.path.exists(self.path):
+            return self.done
+        with open(self.path, encoding="utf-8") as f:
+            if f.readline().rstrip("\n") != self.signature:
+                print(f"[checkpoint] {self.path} belongs to another import, starting over")
+                return self.done
+            self.done = {line.rstrip("\n") for line in f if line.strip()}
+        return self.done
+
+    def record(self, user_ids: Iterable[str]) -> None:
+        """Append ids whose SetUserValues succeeded."""
+        with self._lock:
+            if self._file is None:
+                fresh = not self.done
+                self._file = open(self.path, "w" if fresh else "a", encoding="utf-8")
+                if fresh:
+                    self._file.write(self.signature + "\n")
+            self._file.writelines(f"{user_id}\n" for user_id in user_ids)
+            self._file.flush()
+
+    def close(self, completed: bool) -> None:
+        """Close the file; a completed import removes its checkpoint."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if completed and os.path.exists(self.path):
+            os.remove(self.path)
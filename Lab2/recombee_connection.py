@@ -0,0 +1,37 @@
+import os
+
+from recombee_api_client.api_client import RecombeeClient, Region
+
+
+class PlainHttpRecombeeClient(RecombeeClient):
+    """RecombeeClient that keeps every request on plain HTTP.
+
+    ``Batch`` requests force HTTPS on their own, which a local stand-in
+    server (see Lab1/fake_recombee.py) cannot answer.
+    """
+
+    def send(self, request):
+        request.ensure_https = False
+        return super().send(request)
+
+
+def make_client(database_id: str, token: str, region: Region) -> RecombeeClient:
+    """Create a Recombee client for the configured server.
+
+    Args:
+        database_id (str): Recombee database id.
+        token (str): Private token of the database.
+        region (Region): Region used when no RECOMBEE_BASE_URI is set.
+
+    Returns:
+        RecombeeClient: Client for ``region``, or for RECOMBEE_BASE_URI
+        over RECOMBEE_PROTOCOL when that variable is set.
+    """
+    base_uri = os.getenv("RECOMBEE_BASE_URI", "").strip()
+    if not base_uri:
+        return RecombeeClient(database_id, token, region=region)
+    protocol = os.getenv("RECOMBEE_PROTOCOL", "https").strip().lower()
+    client_class = PlainHttpRecombeeClient if protocol == "http" else RecombeeClient
+    return client_class(
+        database_id, token, protocol=protocol, options={"base_uri": base_uri}
+    )
@@ -0,0 +1,922 @@
+"""Import users from a CSV file into Recombee.
+
+``UserImporter`` runs the import as separate stages (load, prepare,
+schema, values, ids, send) that can be called and timed on their own.
+Importing this module has no side effects: the Recombee client is only
+created when the first request is sent, any object with a
+``send(request)`` method can be injected instead, and ``dry_run=True``
+goes through every stage without touching the network.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from recombee_api_client.api_client import Region
+from recombee_api_client.api_requests import Batch, SetUserValues
+
+from batch_sender import BatchSender, SendReport
+from import_checkpoint import ImportCheckpoint
+from recombee_connection import make_client
+from user_schema import UserSchemaManager
+
+
+TRUE_VALUES = {"true", "1", "yes", "y", "t"}
+BOOLEAN_VALUES = TRUE_VALUES | {"false", "0", "no", "n", "f"}
+
+
+def slug_prop(name: str) -> str:
+    """Convert a string into a valid property name slug.
+
+    Args:
+        name (str): The string to convert into a property name slug.
+
+    Returns:
+        str: A valid property name that only contains lowercase letters,
+        numbers, and underscores.
+    """
+    norm = unicodedata.normalize('NFKD', str(name))
+    base = "".join(ch for ch in norm if not unicodedata.combining(ch)).lower()
+    base = re.sub(r"[^a-z0-9_]+", "_", base)
+    base = re.sub(r"_+", "_", base).strip("_")
+    if not base:
+        base = "field"
+    if base[0].isdigit():
+        base = f"f_{base}"
+    return base
+
+
+def infer_type(series) -> str:
+    """Infer the data type of a pandas Series.
+
+    Args:
+        series: A pandas Series to analyze.
+
+    Returns:
+        str: One of 'string', 'boolean', 'int', or 'double'.
+    """
+    s = series.dropna()
+    if s.empty:
+        return "string"
+    low = s.astype(str).str.lower().str.strip()
+    if low.isin(BOOLEAN_VALUES).mean() > 0.95:
+        return "boolean"
+    as_num = pd.to_numeric(s, errors="coerce")
+    if as_num.notna().mean() > 0.9:
+        if (as_num.dropna() % 1 == 0).mean() > 0.99:
+            return "int"
+        return "double"
+    return "string"
+
+
+def reservoir_sample(chunks: Iterable[pd.DataFrame], size: int,
+                     seed: int = 0) -> Tuple[pd.DataFrame, int]:
+    """Draw a uniform sample of rows from a stream of chunks.
+
+    Algorithm R, vectorized per chunk: row ``t`` (0-based) takes slot
+    ``t`` while the reservoir fills, then a random slot below ``t + 1``
+    if that slot is smaller than ``size``. Later rows win a shared slot,
+    as they would one row at a time.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): The rows, in order.
+        size (int): Rows to keep.
+        seed (int): Seed of the slot draws, so a file gives the same
+            sample (and schema) on every run.
+
+    Returns:
+        Tuple[pd.DataFrame, int]: The sample (at most ``size`` rows, in
+        file order) and the number of rows seen.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    seen = 0
+    for chunk in chunks:
+        rows = np.arange(seen, seen + len(chunk))
+        seen += len(chunk)
+        slots = np.where(rows < size, rows, rng.integers(0, rows + 1))
+        take = np.flatnonzero(slots < size)
+        if not len(take):
+            continue
+        # Keep the last row drawn for each slot
+        last = len(take) - 1 - np.unique(slots[take][::-1], return_index=True)[1]
+        take = take[last]
+        picked = chunk.iloc[take].set_axis(slots[take])
+        if reservoir is None:
+            reservoir = picked
+        else:
+            reservoir = pd.concat([reservoir.drop(index=picked.index, errors="ignore"), picked])
+    if reservoir is None:
+        return pd.DataFrame(), seen
+    return reservoir.sort_index(), seen
+
+
+def type_mismatches(series: pd.Series, typ: str) -> np.ndarray:
+    """Flag the values of a column that do not fit its inferred type.
+
+    Args:
+        series (pd.Series): The column.
+        typ (str): Recombee type inferred for the column.
+
+    Returns:
+        np.ndarray: True for each present value that is not a boolean
+        literal, a number or a whole number for 'boolean', 'double' and
+        'int'; strings accept everything.
+    """
+    present = series.notna().to_numpy()
+    bad = np.zeros(len(series), dtype=bool)
+    if typ not in ("boolean", "int", "double") or not present.any():
+        return bad
+    values = series[present]
+    if typ == "boolean":
+        ok = values.astype(str).str.lower().str.strip().isin(BOOLEAN_VALUES)
+    else:
+        as_num = pd.to_numeric(values, errors="coerce")
+        ok = as_num.notna()
+        if typ == "int":
+            ok &= as_num % 1 == 0
+    bad[present] = ~ok.to_numpy()
+    return bad
+
+
+def ascii_slug(text: str) -> str:
+    """Convert text to ASCII slug format.
+
+    Args:
+        text (str): The text to convert.
+
+    Returns:
+        str: ASCII-safe slug version of the text.
+    """
+    if not text:
+        return ""
+    norm = unicodedata.normalize('NFKD', str(text))
+    clean = "".join(ch for ch in norm if not unicodedata.combining(ch)).lower()
+    return re.sub(r"[^a-z0-9._-]+", "", clean)
+
+
+def split_first_last(full_name: str) -> Tuple[str, str]:
+    """Split a full name into first and last names.
+
+    Args:
+        full_name (str): The full name to split.
+
+    Returns:
+        Tuple[str, str]: A tuple of (first_name, last_name).
+    """
+    if not full_name:
+        return "", ""
+    parts = [p for p in re.split(r"\s+", str(full_name).strip()) if p]
+    if not parts:
+        return "", ""
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[0], parts[-1]
+
+
+def ascii_slug_series(texts: pd.Series) -> pd.Series:
+    """Vectorized ``ascii_slug`` for a column of strings.
+
+    Args:
+        texts (pd.Series): Strings to convert.
+
+    Returns:
+        pd.Series: ASCII slugs; combining marks left by NFKD are outside
+        ``[a-z0-9._-]`` and go away with the final filter.
+    """
+    return (
+        texts.str.normalize("NFKD")
+        .str.lower()
+        .str.replace(r"[^a-z0-9._-]+", "", regex=True)
+    )
+
+
+def email_candidates(first_slug: str, last_slug: str) -> List[str]:
+    """List the email local parts to try for a name, best first.
+
+    Args:
+        first_slug (str): Slug of the first name.
+        last_slug (str): Slug of the last name.
+
+    Returns:
+        List[str]: Candidate local parts; the first one is also the base
+        for numbered fallbacks.
+    """
+    if first_slug and last_slug:
+        return [
+            f"{first_slug}.{last_slug}",
+            f"{first_slug}_{last_slug}",
+            f"{first_slug}{last_slug}",
+            f"{first_slug[0]}{last_slug}"
+        ]
+    if first_slug:
+        return [first_slug, f"{first_slug}1"]
+    if last_slug:
+        return [last_slug, f"{last_slug}1"]
+    return ["user"]
+
+
+def build_emails(full_names: List[str], domains: List[str], existing: set) -> List[str]:
+    """Build unique email addresses for many names at once.
+
+    Names are split and slugged with vectorized string operations, once
+    per distinct name. Addresses are assigned in order exactly as one
+    call per name would: the first free candidate, else ``<base><i>``
+    with the smallest free ``i >= 2``. Numbered fallbacks continue from a
+    per-base counter instead of probing from 2 again.
+
+    Args:
+        full_names (List[str]): Full names, one per address to build.
+        domains (List[str]): Email domain for each name.
+        existing (set): Addresses already taken; new ones are added.
+
+    Returns:
+        List[str]: One unique address per name.
+    """
+    texts = [str(name) if name else "" for name in full_names]
+    distinct = pd.Series(list(dict.fromkeys(texts)), dtype=object)
+    parts = distinct.str.strip().str.split(r"\s+", regex=True)
+    first = ascii_slug_series(parts.str[0].fillna(""))
+    last = ascii_slug_series(parts.str[-1].where(parts.str.len() > 1, "").fillna(""))
+    candidates_of = {
+        text: email_candidates(f, l)
+        for text, f, l in zip(distinct.tolist(), first.tolist(), last.tolist())
+    }
+
+    next_suffix: Dict[Tuple[str, str], int] = {}
+    emails = []
+    for text, domain in zip(texts, domains):
+        candidates = candidates_of[text]
+        for base in candidates:
+            email = f"{base}@{domain}"
+            if email not in existing:
+                break
+        else:
+            key = (candidates[0], domain)
+            i = next_suffix.get(key, 2)
+            email = f"{candidates[0]}{i}@{domain}"
+            while email in existing:
+                i += 1
+                email = f"{candidates[0]}{i}@{domain}"
+            next_suffix[key] = i + 1
+        existing.add(email)
+        emails.append(email)
+    return emails
+
+
+def _convert_value(val, typ: str):
+    """Convert one non-null value to its Recombee type, falling back to a string."""
+    try:
+        if typ == "int":
+            return int(val)
+        if typ == "double":
+            return float(val)
+    except Exception:
+        pass
+    return str(val)[:512]
+
+
+def convert_column(series: pd.Series, typ: str) -> list:
+    """Convert a whole column to Recombee values in one pass.
+
+    Args:
+        series (pd.Series): The column to convert.
+        typ (str): Recombee type inferred for the column.
+
+    Returns:
+        list: One value per row, None where the row has no value.
+    """
+    mask = series.notna().to_numpy()
+    out = np.full(len(series), None, dtype=object)
+    present = series[mask]
+    numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    if typ == "boolean":
+        low = present.astype(str).str.strip().str.lower()
+        out[mask] = low.isin(TRUE_VALUES).tolist()
+    elif typ == "int" and numeric:
+        out[mask] = np.trunc(present.to_numpy(dtype="float64")).astype("int64").tolist() \
+            if pd.api.types.is_float_dtype(series) else present.astype("int64").tolist()
+    elif typ == "double" and numeric:
+        out[mask] = present.astype("float64").tolist()
+    elif typ in ("int", "double"):
+        # Mixed object column: keep the per-value fallback to strings
+        out[mask] = [_convert_value(val, typ) for val in present.tolist()]
+    else:
+        out[mask] = present.astype(str).str[:512].tolist()
+    return out.tolist()
+
+
+def build_user_values(frame: pd.DataFrame, prop_map: Dict[str, str],
+                      types: Dict[str, str]) -> List[Dict[str, object]]:
+    """Build the typed SetUserValues dict of every row.
+
+    Args:
+        frame (pd.DataFrame): The users to convert.
+        prop_map (Dict[str, str]): Column name to Recombee property name.
+        types (Dict[str, str]): Recombee property name to its type.
+
+    Returns:
+        List[Dict[str, object]]: One {property: value} dict per row,
+        without the properties the row has no value for.
+    """
+    props = []
+    columns = []
+    for orig, prop in prop_map.items():
+        if orig not in frame.columns:
+            continue
+        props.append(prop)
+        columns.append(convert_column(frame[orig], types.get(prop, "string")))
+    return [
+        {prop: val for prop, val in zip(props, row) if val is not None}
+        for row in zip(*columns)
+    ] if columns else [{} for _ in range(len(frame))]
+
+
+def stable_user_id(value) -> str:
+    """Derive a user ID (12-hex digest) from a key value.
+
+    Args:
+        value: The key value, e.g. an ``SP ID`` or an email address.
+
+    Returns:
+        str: The same 12-character hexadecimal string for the same value
+        on every run.
+    """
+    return hashlib.sha1(str(value).strip().encode("utf-8")).hexdigest()[:12]
+
+
+def generate_random_user_id() -> str:
+    """Generate a short random user ID (12-hex digest).
+
+    Returns:
+        str: A random 12-character hexadecimal string.
+    """
+    return hashlib.sha1(uuid.uuid4().bytes).hexdigest()[:12]
+
+
+class DryRunClient:
+    """Transport that answers every request locally and counts them.
+
+    Batches get a 200 for each request and listings an empty list, so a
+    dry run goes through every stage and reports what would be sent.
+    """
+
+    def __init__(self):
+        self.sent: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def send(self, request):
+        inner = request.requests if isinstance(request, Batch) else [request]
+        with self._lock:
+            self.sent.update(type(r).__name__ for r in inner)
+        if isinstance(request, Batch):
+            return [{"code": 200, "json": "ok"} for _ in inner]
+        return [] if type(request).__name__.startswith("List") else "ok"
+
+
+class ImportResult:
+    """Outcome of ``UserImporter.run``."""
+
+    def __init__(self, send_report: SendReport, skipped: int,
+                 schema_report: Dict[str, list], timings: Dict[str, float],
+                 mismatches: Optional[Dict[str, int]] = None):
+        self.send_report = send_report
+        self.skipped = skipped
+        self.schema_report = schema_report
+        self.timings = timings
+        self.mismatches = mismatches or {}
+
+    @property
+    def imported(self) -> int:
+        """Users imported by this run or by the run it resumed."""
+        return self.send_report.sent + self.skipped
+
+
+class UserImporter:
+    """Import the users of a CSV file with typed properties.
+
+    With ``chunk_size`` the file is streamed twice instead of loaded: a
+    first pass draws a reservoir sample of ``sample_size`` rows to infer
+    the property types, a second pass imports it chunk by chunk. Values
+    that do not fit the inferred type are left out and reported per chunk.
+
+    Args:
+        database_id (str): Recombee database id.
+        token (str): Private token of the database.
+        region (Region): Region passed to ``client_factory``.
+        csv_path (str): CSV file with one user per row.
+        max_users (Optional[int]): Only import the first rows.
+        batch_size (int): Requests per ``Batch`` call.
+        concurrency (int): Batches in flight at once.
+        max_retries (int): Retries of a failed batch or request.
+        schema_ttl (float): Seconds the cached property list stays valid.
+        user_id_column (str): Column giving stable user ids; random ids
+            when empty.
+        checkpoint_path (Optional[str]): Resume file, only used with
+            ``user_id_column``; defaults to ``<csv_path>.checkpoint``.
+        email_domain (str): Domain of every generated email.
+        email_domains (List[str]): Domains picked at random otherwise.
+        chunk_size (Optional[int]): Rows read at a time; the whole file is
+            loaded when None.
+        sample_size (int): Rows sampled for type inference when chunked.
+        client: Object with a ``send(request)`` method; created with
+            ``client_factory`` on first use when None.
+        client_factory (Callable): Builds the client from
+            (database_id, token, region).
+        dry_run (bool): Send nothing; use a ``DryRunClient`` and leave
+            the schema cache and checkpoint untouched.
+    """
+
+    def __init__(self, database_id: str = "", token: str = "",
+                 region: Region = Region.EU_WEST, csv_path: str = "people.csv",
+                 max_users: Optional[int] = None, batch_size: int = 100,
+                 concurrency: int = 4, max_retries: int = 3, schema_ttl: float = 3600,
+                 user_id_column: str = "", checkpoint_path: Optional[str] = None,
+                 email_domain: str = "", email_domains: Optional[List[str]] = None,
+                 chunk_size: Optional[int] = None, sample_size: int = 10_000,
+                 client=None, client_factory: Callable = make_client,
+                 dry_run: bool = False):
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.database_id = database_id
+        self.token = token
+        self.region = region
+        self.csv_path = csv_path
+        self.max_users = max_users
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.schema_ttl = schema_ttl
+        self.user_id_column = user_id_column
+        if checkpoint_path is None:
+            checkpoint_path = f"{csv_path}.checkpoint" if user_id_column else ""
+        self.checkpoint_path = checkpoint_path
+        self.email_domain = email_domain
+        self.email_domains = list(email_domains or [])
+        self.chunk_size = chunk_size
+        self.sample_size = sample_size
+        self.client_factory = client_factory
+        self.dry_run = dry_run
+        self.timings: Dict[str, float] = {}
+        self._client = client
+
+    @classmethod
+    def from_env(cls, **overrides) -> "UserImporter":
+        """Build an importer from the RECOMBEE_* and import variables.
+
+        Args:
+            **overrides: Constructor arguments that win over the environment.
+
+        Returns:
+            UserImporter: The configured importer.
+        """
+        region_str = os.getenv("RECOMBEE_REGION", "EU_WEST").strip().upper()
+        if region_str not in ("EU_WEST", "US_WEST"):
+            raise ValueError("RECOMBEE_REGION must be 'EU_WEST' or 'US_WEST'.")
+        max_users = os.getenv("MAX_USERS", "").strip()
+        chunk_size = os.getenv("IMPORT_CHUNK_SIZE", "").strip()
+        config = dict(
+            database_id=os.getenv("RECOMBEE_DATABASE_ID", "").strip(),
+            token=os.getenv("RECOMBEE_SECRET_TOKEN", "").strip(),
+            region=getattr(Region, region_str),
+            csv_path=os.getenv("USERS_CSV_PATH", "people.csv").strip(),
+            max_users=int(max_users) if max_users.isdigit() else None,
+            batch_size=int(os.getenv("RECOMBEE_BATCH_SIZE", "100")),
+            concurrency=int(os.getenv("RECOMBEE_CONCURRENCY", "4")),
+            max_retries=int(os.getenv("RECOMBEE_MAX_RETRIES", "3")),
+            schema_ttl=int(os.getenv("RECOMBEE_SCHEMA_TTL", "3600")),
+            user_id_column=os.getenv("USER_ID_COLUMN", "").strip(),
+            checkpoint_path=os.getenv("IMPORT_CHECKPOINT", "").strip() or None,
+            email_domain=os.getenv("EMAIL_DOMAIN", "").strip(),
+            email_domains=[d.strip() for d in os.getenv("EMAIL_DOMAINS", "").split(",")
+                           if d.strip()],
+            chunk_size=int(chunk_size) if chunk_size.isdigit() and int(chunk_size) else None,
+            sample_size=int(os.getenv("IMPORT_SAMPLE_SIZE", "10000")),
+            dry_run=os.getenv("IMPORT_DRY_RUN", "").strip().lower() in TRUE_VALUES,
+        )
+        config.update(overrides)
+        return cls(**config)
+
+    @property
+    def client(self):
+        """The transport, created on first use."""
+        if self._client is None:
+            if self.dry_run:
+                self._client = DryRunClient()
+            elif not self.database_id or not self.token:
+                raise ValueError("Please set RECOMBEE_DATABASE_ID and "
+                                 "RECOMBEE_SECRET_TOKEN in .env")
+            else:
+                self._client = self.client_factory(self.database_id, self.token, self.region)
+        return self._client
+
+    def pick_domains(self, n: int) -> List[str]:
+        """Pick email domains for ``n`` generated emails in one draw.
+
+        Args:
+            n (int): Number of emails to generate.
+
+        Returns:
+            List[str]: One domain name per email.
+        """
+        if self.email_domain or not self.email_domains:
+            return [self.email_domain or "example.com"] * n
+        return np.random.default_rng().choice(self.email_domains, size=n).tolist()
+
+    def _check_rows(self, columns, rows: int) -> None:
+        column = self.user_id_column
+        if column and column not in columns and column != "email":
+            raise ValueError(f"USER_ID_COLUMN '{column}' is not a column of {self.csv_path}")
+        if rows < 20:
+            print(f"⚠️ Only {rows} rows found. The lab expects at least 20 users.")
+
+    def load(self) -> pd.DataFrame:
+        """Read the CSV (up to ``max_users`` rows) and check the key column.
+
+        Returns:
+            pd.DataFrame: The raw users.
+        """
+        df = pd.read_csv(self.csv_path)
+        if self.max_users:
+            df = df.head(self.max_users)
+        self._check_rows(df.columns, len(df))
+        return df
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Read the CSV ``chunk_size`` rows at a time, up to ``max_users``.
+
+        Yields:
+            pd.DataFrame: Consecutive chunks; the index keeps counting
+            rows across chunks.
+        """
+        # Columns are read as text so that a chunk's dtype cannot depend on its rows
+        yield from pd.read_csv(self.csv_path, chunksize=self.chunk_size or 100_000,
+                               nrows=self.max_users or None, dtype=str)
+
+    def sample(self) -> Tuple[pd.DataFrame, set]:
+        """First pass over the file in chunks.
+
+        Returns:
+            Tuple[pd.DataFrame, set]: A reservoir sample of
+            ``sample_size`` raw rows, and the lowercased emails the file
+            already has (generated emails must avoid all of them); empty
+            when no email is missing, so nothing grows with the file.
+        """
+        existing_emails: set = set()
+        columns = []
+        missing = [0]
+
+        def chunks():
+            for chunk in self.iter_chunks():
+                columns[:] = chunk.columns
+                emails = chunk.get("email", pd.Series(None, index=chunk.index, dtype=object))
+                missing[0] += int((emails.isna() | (emails.str.strip() == "")).sum())
+                yield chunk
+
+        sample, rows = reservoir_sample(chunks(), self.sample_size)
+        if missing[0] and "email" in columns:
+            for emails in pd.read_csv(self.csv_path, usecols=["email"], dtype=str,
+                                      chunksize=self.chunk_size or 100_000,
+                                      nrows=self.max_users or None):
+                existing_emails.update(emails["email"].dropna().str.lower())
+        if sample.empty:
+            sample = pd.DataFrame(columns=columns, dtype=object)
+        self._check_rows(columns, rows)
+        print(f"[users] {rows} rows, types inferred from a sample of {len(sample)}")
+        return sample, existing_emails
+
+    def prepare(self, df: pd.DataFrame, existing_emails: Optional[set] = None) -> pd.DataFrame:
+        """Fill in the sales_person, name and email columns, in place.
+
+        Args:
+            df (pd.DataFrame): Users from ``load``, or one chunk.
+            existing_emails (Optional[set]): Lowercased addresses that
+                generated emails must avoid, updated with the new ones;
+                the emails of ``df`` when None.
+
+        Returns:
+            pd.DataFrame: The same frame.
+        """
+        if "Sales person" in df.columns and "sales_person" not in df.columns:
+            df["sales_person"] = df["Sales person"]
+
+        if "name" not in df.columns:
+            names = df.get("sales_person", pd.Series("", index=df.index)).fillna("")
+            names = names.astype(object)
+            blank = (names.astype(str).str.strip() == "").to_numpy()
+            if blank.any():
+                # fullname when present, else user<row number>
+                fallback = pd.Series([f"user{i+1}" for i in df.index[blank]],
+                                     index=df.index[blank], dtype=object)
+                if "fullname" in df.columns:
+                    fullname = df.loc[blank, "fullname"]
+                    fallback = fallback.where(fullname.isna(),
+                                              fullname.astype(str).str.strip())
+                names[blank] = fallback
+            df["name"] = names
+
+        if "email" not in df.columns:
+            df["email"] = None
+
+        if existing_emails is None:
+            existing_emails = set(str(e).lower() for e in df["email"].dropna().astype(str))
+        emails = df["email"]
+        missing_email = (emails.isna() | (emails.astype(str).str.strip() == "")).to_numpy()
+        if missing_email.any():
+            missing_rows = df[missing_email]
+            full_names = [
+                (sales_person or name or "")
+                for sales_person, name in zip(
+                    missing_rows.get("sales_person",
+                                     pd.Series(None, index=missing_rows.index)).tolist(),
+                    missing_rows.get("name", pd.Series(None, index=missing_rows.index)).tolist(),
+                )
+            ]
+            domains = self.pick_domains(len(full_names))
+            df["email"] = df["email"].astype(object)
+            df.loc[missing_email, "email"] = build_emails(full_names, domains, existing_emails)
+        return df
+
+    def property_map(self, df: pd.DataFrame) -> Dict[str, str]:
+        """Map every column to its Recombee property name.
+
+        Args:
+            df (pd.DataFrame): Users from ``prepare``.
+
+        Returns:
+            Dict[str, str]: Column name to property name.
+        """
+        prop_map: Dict[str, str] = {}
+        if "sales_person" in df.columns:
+            prop_map["sales_person"] = "sales_person"
+        prop_map["name"] = "name"
+        prop_map["email"] = "email"
+        for col in df.columns:
+            if col not in prop_map:
+                prop_map[col] = slug_prop(col)
+        return prop_map
+
+    def infer_schema(self, df: pd.DataFrame, prop_map: Dict[str, str]) -> Dict[str, str]:
+        """Infer the Recombee type of every property.
+
+        Args:
+            df (pd.DataFrame): Users from ``prepare``, or a prepared sample.
+            prop_map (Dict[str, str]): Output of ``property_map``.
+
+        Returns:
+            Dict[str, str]: Property name to Recombee type.
+        """
+        schema_types: Dict[str, str] = {}
+        for orig, prop in prop_map.items():
+            if prop in schema_types:
+                continue
+            schema_types[prop] = infer_type(df[orig]) if orig in df.columns else "string"
+        return schema_types
+
+    def ensure_schema(self, schema_types: Dict[str, str]) -> Dict[str, list]:
+        """Create the missing user properties and print what happened.
+
+        Args:
+            schema_types (Dict[str, str]): Output of ``infer_schema``.
+
+        Returns:
+            Dict[str, list]: The ``UserSchemaManager.ensure`` report.
+        """
+        cache_path = None
+        if not self.dry_run:
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(self.csv_path)),
+                                      f".recombee_schema.{self.database_id}.user.json")
+        schema = UserSchemaManager(self.client, self.database_id, cache_path=cache_path,
+                                   ttl=self.schema_ttl)
+        report = schema.ensure(list(schema_types.items()))
+        print(f"[schema:user] {len(report['existing'])} present, "
+              f"{len(report['created'])} created ({schema.round_trips} round trips)")
+        for prop in report["created"]:
+            print(f"[schema:user] {prop}: {schema_types[prop]}")
+        for prop, expected, actual in report["mismatched"]:
+            print(f"[warn] property {prop} exists as '{actual}', expected '{expected}'")
+        for prop, error in report["failed"]:
+            print(f"[warn] could not create property {prop}: {error}")
+        return report
+
+    def drop_mismatches(self, df: pd.DataFrame, prop_map: Dict[str, str],
+                        schema_types: Dict[str, str]) -> Dict[str, Tuple[int, str]]:
+        """Blank out the values that do not fit their property type, in place.
+
+        Numeric columns are converted to numbers on the way, so that they
+        take the vectorized path of ``convert_column``.
+
+        Args:
+            df (pd.DataFrame): One prepared chunk.
+            prop_map (Dict[str, str]): Output of ``property_map``.
+            schema_types (Dict[str, str]): Output of ``infer_schema``.
+
+        Returns:
+            Dict[str, Tuple[int, str]]: Property name to the number of
+            values left out and the first of them.
+        """
+        mismatches = {}
+        for orig, prop in prop_map.items():
+            if orig not in df.columns:
+                continue
+            typ = schema_types.get(prop, "string")
+            bad = type_mismatches(df[orig], typ)
+            if bad.any():
+                mismatches[prop] = (int(bad.sum()), str(df[orig].to_numpy()[bad][0]))
+                df[orig] = df[orig].mask(bad)
+            if typ in ("int", "double"):
+                df[orig] = pd.to_numeric(df[orig])
+        return mismatches
+
+    def user_ids(self, df: pd.DataFrame) -> List[str]:
+        """Derive the user id of every row, without printing anything.
+
+        Args:
+            df (pd.DataFrame): Users from ``prepare``, or one chunk.
+
+        Returns:
+            List[str]: Ids derived from ``user_id_column``, or random ones.
+        """
+        column = self.user_id_column
+        if not column:
+            return [generate_random_user_id() for _ in range(len(df))]
+        keys = df[column]
+        if column == "email":
+            keys = keys.astype(str).str.lower()
+        if keys.isna().any() or (keys.astype(str).str.strip() == "").any():
+            raise ValueError(f"USER_ID_COLUMN '{column}' has empty values")
+        return [stable_user_id(key) for key in keys.tolist()]
+
+    def _announce_ids(self) -> None:
+        column = self.user_id_column
+        if column == "email" and len(self.email_domains) > 1 and not self.email_domain:
+            print("[warn] generated emails pick a random domain from EMAIL_DOMAINS, "
+                  "so their ids change between runs; set EMAIL_DOMAIN for stable ids")
+        print(f"[users] ids derived from '{column}'")
+
+    def assign_ids(self, df: pd.DataFrame) -> List[str]:
+        """Give every row its user id and warn about shared keys.
+
+        Args:
+            df (pd.DataFrame): Users from ``prepare``.
+
+        Returns:
+            List[str]: Ids derived from ``user_id_column``, or random ones.
+        """
+        user_ids = self.user_ids(df)
+        if self.user_id_column:
+            self._announce_ids()
+            duplicates = len(user_ids) - len(set(user_ids))
+            if duplicates:
+                print(f"[warn] {duplicates} rows share a '{self.user_id_column}' value; "
+                      "the last one wins")
+        return user_ids
+
+    def send(self, users: Iterable[Tuple[str, Dict[str, object]]]) -> Tuple[SendReport, int]:
+        """Send one SetUserValues per user and print the summary.
+
+        Users recorded in the checkpoint by a previous run are skipped.
+
+        Args:
+            users: (user id, property values) pairs; a generator is
+                consumed as the batches go out.
+
+        Returns:
+            Tuple[SendReport, int]: The send report and the number of users
+            skipped because a previous run imported them.
+        """
+        checkpoint = None
+        if self.checkpoint_path and self.user_id_column:
+            checkpoint = ImportCheckpoint(
+                self.checkpoint_path, f"db={self.database_id} key={self.user_id_column}"
+            )
+            if checkpoint.load():
+                print(f"[checkpoint] resuming: {len(checkpoint.done)} users already "
+                      f"imported ({self.checkpoint_path})")
+        done = checkpoint.done if checkpoint else ()
+        record = checkpoint.record if checkpoint and not self.dry_run else None
+        skipped = [0]
+        reported = [0]
+
+        def report_progress(sent: int) -> None:
+            """Print a progress line every 200 imported users."""
+            sent += skipped[0]
+            if sent // 200 > reported[0]:
+                reported[0] = sent // 200
+                print(f"[users] imported {sent}…")
+
+        def pending():
+            for user_id, values in users:
+                if user_id in done:
+                    skipped[0] += 1
+                    continue
+                yield user_id, SetUserValues(user_id, values, cascade_create=True)
+
+        # SetUserValues with cascade_create creates the user, so no AddUser round trip
+        sender = BatchSender(
+            self.client,
+            batch_size=self.batch_size,
+            concurrency=self.concurrency,
+            max_retries=self.max_retries,
+            on_progress=report_progress,
+            on_sent=record,
+        )
+        try:
+            send_report = sender.send(pending())
+        finally:
+            if checkpoint:
+                checkpoint.close(completed=False)
+        send_report.print_summary("users")
+        if record:
+            if send_report.failed:
+                print(f"[checkpoint] {len(send_report.failed)} users left; "
+                      "re-run to retry them")
+            else:
+                checkpoint.close(completed=True)
+        return send_report, skipped[0]
+
+    def _timed(self, stage: str, func: Callable, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+    def run(self) -> ImportResult:
+        """Run every stage in order, streaming the file when ``chunk_size`` is set.
+
+        Returns:
+            ImportResult: Send report, resumed users, per-stage timings
+            and, when chunked, the values left out per property.
+        """
+        self.timings = {}
+        if self.chunk_size:
+            return self._run_chunked()
+        df = self._timed("load", self.load)
+        df = self._timed("prepare", self.prepare, df)
+        prop_map = self.property_map(df)
+        schema_types = self._timed("infer_schema", self.infer_schema, df, prop_map)
+        schema_report = self._timed("ensure_schema", self.ensure_schema, schema_types)
+        user_values = self._timed("build_values", build_user_values, df, prop_map, schema_types)
+        user_ids = self._timed("assign_ids", self.assign_ids, df)
+        send_report, skipped = self._timed("send", self.send, zip(user_ids, user_values))
+        return ImportResult(send_report, skipped, schema_report, dict(self.timings))
+
+    def _run_chunked(self) -> ImportResult:
+        sample, existing_emails = self._timed("sample", self.sample)
+        # A copy of the emails, so the sample's generated ones do not take real addresses
+        sample = self.prepare(sample, set(existing_emails))
+        prop_map = self.property_map(sample)
+        schema_types = self._timed("infer_schema", self.infer_schema, sample, prop_map)
+        del sample
+        schema_report = self._timed("ensure_schema", self.ensure_schema, schema_types)
+        if self.user_id_column:
+            self._announce_ids()
+
+        mismatches: Dict[str, int] = {}
+        # Ids are 12 hex digits, so 8 bytes per row are enough to count duplicates
+        id_keys: List[np.ndarray] = []
+
+        def users():
+            start = time.perf_counter()
+            for number, chunk in enumerate(self.iter_chunks(), 1):
+                chunk = self.prepare(chunk, existing_emails)
+                dropped = self.drop_mismatches(chunk, prop_map, schema_types)
+                if dropped:
+                    details = ", ".join(f"{prop} {count} not {schema_types[prop]} (e.g. {example!r})"
+                                        for prop, (count, example) in dropped.items())
+                    print(f"[chunk {number}] rows {chunk.index[0] + 1}-{chunk.index[-1] + 1}: "
+                          f"left out {details}")
+                    for prop, (count, _) in dropped.items():
+                        mismatches[prop] = mismatches.get(prop, 0) + count
+                values = build_user_values(chunk, prop_map, schema_types)
+                ids = self.user_ids(chunk)
+                if self.user_id_column:
+                    id_keys.append(np.array([int(user_id, 16) for user_id in ids],
+                                            dtype=np.uint64))
+                del chunk
+                self.timings["chunks"] = (self.timings.get("chunks", 0.0)
+                                          + time.perf_counter() - start)
+                yield from zip(ids, values)
+                start = time.perf_counter()
+
+        send_report, skipped = self._timed("send", self.send, users())
+        self.timings["send"] -= self.timings.get("chunks", 0.0)
+        keys = np.concatenate(id_keys) if id_keys else np.empty(0, dtype=np.uint64)
+        duplicates = len(keys) - len(np.unique(keys))
+        if duplicates:
+            print(f"[warn] {duplicates} rows share a '{self.user_id_column}' value; "
+                  "the last one wins")
+        if mismatches:
+            total = sum(mismatches.values())
+            print(f"[warn] {total} values did not fit the inferred types and were left out: "
+                  + ", ".join(f"{prop} {n}" for prop, n in mismatches.items()))
+        return ImportResult(send_report, skipped, schema_report, dict(self.timings),
+                            mismatches)
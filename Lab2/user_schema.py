@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from recombee_api_client.api_requests import (
+    AddUserProperty,
+    Batch,
+    ListUserProperties,
+)
+
+
+class UserSchemaManager:
+    """Fetch, cache and complete the user property schema of a database.
+
+    The existing user properties are listed once and cached in a local JSON
+    file for ``ttl`` seconds. Missing properties are created together in a
+    single ``Batch``; properties that exist with another type are reported.
+    """
+
+    def __init__(self, client, database_id: str, cache_path: Optional[str] = None,
+                 ttl: float = 3600):
+        self.client = client
+        self.database_id = database_id
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.round_trips = 0
+
+    def _read_cache(self) -> Optional[Dict[str, str]]:
+        """Return the cached {name: type} map, or None if missing or stale."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("database_id") != self.database_id:
+            return None
+        if time.time() - data.get("fetched_at", 0) > self.ttl:
+            return None
+        return data.get("properties", {})
+
+    def _write_cache(self, properties: Dict[str, str]) -> None:
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "database_id": self.database_id,
+                "fetched_at": time.time(),
+                "properties": properties,
+            }, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def fetch(self, refresh: bool = False) -> Dict[str, str]:
+        """Return the existing user properties.
+
+        Args:
+            refresh (bool): Ignore the local cache and ask Recombee.
+
+        Returns:
+            Dict[str, str]: Property name to Recombee type.
+        """
+        if not refresh:
+            cached = self._read_cache()
+            if cached is not None:
+                return cached
+        response = self.client.send(ListUserProperties())
+        self.round_trips += 1
+        properties = {p["name"]: p["type"] for p in response}
+        self._write_cache(properties)
+        return properties
+
+    def ensure(self, wanted: List[Tuple[str, str]]) -> Dict[str, list]:
+        """Create the missing properties in one batch.
+
+        Args:
+            wanted: (property name, Recombee type) pairs.
+
+        Returns:
+            Dict[str, list]: Report with ``existing``, ``created``,
+            ``mismatched`` ((name, expected, actual)) and ``failed``
+            ((name, error)) entries.
+        """
+        report = {"existing": [], "created": [], "mismatched": [], "failed": []}
+        existing = self.fetch()
+
+        missing = []
+        for name, typ in wanted:
+            if name not in existing:
+                missing.append((name, typ))
+            elif existing[name] != typ:
+                report["mismatched"].append((name, typ, existing[name]))
+            else:
+                report["existing"].append(name)
+        if not missing:
+            return report
+
+        responses = self.client.send(
+            Batch([AddUserProperty(name, typ) for name, typ in missing])
+        )
+        self.round_trips += 1
+
+        conflicts = []
+        for (name, typ), resp in zip(missing, responses):
+            code = resp.get("code", 200)
+            if code < 400:
+                report["created"].append(name)
+                existing[name] = typ
+            elif code == 409:
+                conflicts.append((name, typ))
+            else:
+                report["failed"].append((name, f"HTTP {code}: {resp.get('json')}"))
+
+        if conflicts:
+            # The cache was stale: re-read to learn the real types
+            existing = self.fetch(refresh=True)
+            for name, typ in conflicts:
+                if existing.get(name) == typ:
+                    report["existing"].append(name)
+                else:
+                    report["mismatched"].append(
+                        (name, typ, existing.get(name, "missing"))
+                    )
+        else:
+            self._write_cache(existing)
+        return report
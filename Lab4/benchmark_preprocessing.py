@@ -0,0 +1,102 @@
+"""
+Preprocessing benchmark: the original path vs text_preprocessing.py.
+
+The catalog is repeated up to --rows documents and each path is timed up
+to the TF-IDF matrix:
+
+1. apply:  df["text_raw"].apply(preprocess_text) + TfidfVectorizer()
+2. cached: preprocess_documents (lemma cache, process pool) + TfidfVectorizer()
+3. tokens: tokenize_documents (vectorized cleaning, straight to terms)
+           + TfidfVectorizer(analyzer=pretokenized)
+
+The three TF-IDF matrices are checked to be identical.
+
+Usage:
+    python benchmark_preprocessing.py [--rows 50000] [--workers 4] [--skip-apply]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from cosine_similarity_electronics import ensure_nltk_resources
+from text_preprocessing import (
+    DEFAULT_WORKERS,
+    preprocess_documents,
+    preprocess_text,
+    pretokenized,
+    tokenize_documents,
+)
+
+
+def load_texts(csv_path, rows):
+    """Title + Feature of every product, repeated up to `rows` documents."""
+    df = pd.read_csv(csv_path)
+    texts = (df["Title"].fillna("") + " " + df["Feature"].fillna("")).str.strip()
+    repeats = -(-rows // len(texts))
+    return pd.Series(np.tile(texts.to_numpy(), repeats)[:rows], dtype=object)
+
+
+def run_benchmark(texts, stop_words, lemmatizer, workers=DEFAULT_WORKERS, skip_apply=False):
+    """
+    Time every path on `texts`.
+
+    Returns a list of (name, preprocessing seconds, TF-IDF seconds, matrix, vocabulary).
+    """
+    paths = []
+    if not skip_apply:
+        paths.append(("apply", lambda: texts.apply(
+            lambda t: preprocess_text(t, stop_words, lemmatizer)), TfidfVectorizer))
+    paths.append(("cached", lambda: preprocess_documents(
+        texts, stop_words, lemmatizer, workers=workers), TfidfVectorizer))
+    paths.append(("tokens", lambda: tokenize_documents(
+        texts, stop_words, lemmatizer, workers=workers),
+        lambda: TfidfVectorizer(analyzer=pretokenized)))
+
+    results = []
+    for name, preprocess, make_vectorizer in paths:
+        start = time.perf_counter()
+        documents = preprocess()
+        preprocessed = time.perf_counter() - start
+        vectorizer = make_vectorizer()
+        matrix = vectorizer.fit_transform(documents)
+        results.append((name, preprocessed, time.perf_counter() - start - preprocessed,
+                        matrix, vectorizer.get_feature_names_out()))
+    return results
+
+
+def print_results(results):
+    print(f"{'path':>8} {'preprocess s':>13} {'tf-idf s':>9} {'total s':>8} {'speedup':>8} {'same':>5}")
+    base_name, base_pre, base_tfidf, base_matrix, base_vocab = results[0]
+    for name, pre, tfidf, matrix, vocab in results:
+        same = (np.array_equal(vocab, base_vocab) and matrix.shape == base_matrix.shape
+                and abs(matrix - base_matrix).max() == 0)
+        speedup = (base_pre + base_tfidf) / (pre + tfidf)
+        print(f"{name:>8} {pre:>13.2f} {tfidf:>9.2f} {pre + tfidf:>8.2f} "
+              f"{speedup:>7.1f}x {'yes' if same else 'NO':>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="ElectronicsData.csv")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--skip-apply", action="store_true",
+                        help="leave out the slow original path")
+    args = parser.parse_args()
+
+    ensure_nltk_resources()
+    stop_words = set(stopwords.words("english"))
+    lemmatizer = WordNetLemmatizer()
+    texts = load_texts(args.csv, args.rows)
+    print(f"{len(texts):,} documents, {args.workers} worker(s)")
+    print_results(run_benchmark(texts, stop_words, lemmatizer, args.workers, args.skip_apply))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,15 +11,25 @@ Steps:
    - tokenize
    - remove English stopwords
    - lemmatize tokens
+   (text_preprocessing.py runs this on a process pool with vectorized
+   string operations, lemmatizing each distinct token once, and hands the
+   tokens straight to TF-IDF; `--workers 1` keeps it in one process)
 4. Compute TF-IDF vectors for all products.
-5. Compute cosine similarity matrix between all products.
-6. Save similarity matrix to CSV.
+5. Compute cosine similarity matrix between all products
+   (or, with `--top-k K`, only the K most similar products of each one,
+   computed in parallel row blocks: O(N*K) memory instead of N x N).
+6. Save similarity matrix as float32 similarity_matrix.npy + the product
+   index similarity_index.csv (similarity_store.py memory-maps it and reads
+   one product's row; `--csv-matrix` also writes the old CSV); the top-k
+   table goes to similarity_neighbors.npz.
 7. Identify and print:
    - the most similar pair (including possible duplicates)
    - the most similar NON-identical pair (similarity < ~1.0)
 """
 
-import re
+import argparse
+import time
+
 import numpy as np
 import pandas as pd
 
@@ -31,6 +41,10 @@ import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
+from similarity_store import save_similarity
+from similarity_topk import most_similar_pair, top_k_neighbors
+from text_preprocessing import DEFAULT_WORKERS, pretokenized, tokenize_documents
+
 
 def ensure_nltk_resources():
     """Download NLTK resources if they are not already available."""
@@ -42,46 +56,75 @@ def ensure_nltk_resources():
             nltk.download(resource)
 
 
-def preprocess_text(text, stop_words, lemmatizer):
+def dense_similarity(df, tfidf_matrix, csv_matrix=False):
     """
-    Full preprocessing pipeline:
-    - convert to lowercase
-    - remove HTML tags
-    - keep only letters
-    - tokenize
-    - remove stopwords
-    - lemmatize
-    Returns a cleaned string.
+    Steps 5-7 with the full N x N matrix.
+    Returns (i_any, j_any, best_any_score, i_nd, j_nd, best_nd_score).
     """
-    if not isinstance(text, str):
-        text = str(text)
+    # 5. Cosine similarity matrix
+    print("Computing cosine similarity matrix...")
+    similarity_matrix = cosine_similarity(tfidf_matrix)
 
-    # lowercase
-    text = text.lower()
+    # zero out self-similarity on the diagonal
+    np.fill_diagonal(similarity_matrix, 0.0)
 
-    # remove HTML tags if any
-    text = re.sub(r"<.*?>", " ", text)
+    # 6. Save similarity matrix (binary, rows labeled by product id = CSV row)
+    start = time.perf_counter()
+    matrix_path, index_path = save_similarity(
+        similarity_matrix, df[["Title", "Sub Category"]]
+    )
+    print(f"Saved similarity matrix to {matrix_path} + {index_path} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    if csv_matrix:
+        # Text copy labeled by Title (much larger and slower to write)
+        print("Saving similarity matrix to similarity_matrix.csv ...")
+        sim_df = pd.DataFrame(
+            similarity_matrix,
+            index=df["Title"],
+            columns=df["Title"],
+        )
+        sim_df.to_csv("similarity_matrix.csv", encoding="utf-8")
 
-    # keep only letters (replace everything else with space)
-    text = re.sub(r"[^a-z]", " ", text)
+    # 7. Find most similar pairs
 
-    # tokenize
-    tokens = text.split()
+    # 7.1 Most similar pair overall (can include near-duplicates)
+    flat_index = np.argmax(similarity_matrix)
+    i_any, j_any = divmod(flat_index, similarity_matrix.shape[1])
+    best_any_score = similarity_matrix[i_any, j_any]
 
-    # remove stopwords and lemmatize
-    cleaned_tokens = []
-    for tok in tokens:
-        if tok not in stop_words:
-            lemma = lemmatizer.lemmatize(tok)
-            cleaned_tokens.append(lemma)
+    # 7.2 Most similar NON-identical pair (ignore scores >= 0.999)
+    sim_nondup = similarity_matrix.copy()
+    sim_nondup[sim_nondup >= 0.999] = 0.0
 
-    # join back into a string
-    return " ".join(cleaned_tokens)
+    if np.all(sim_nondup == 0.0):
+        # fallback if everything is < 0.999 or there are no duplicates
+        i_nd, j_nd = i_any, j_any
+        best_nd_score = best_any_score
+    else:
+        flat_index_nd = np.argmax(sim_nondup)
+        i_nd, j_nd = divmod(flat_index_nd, sim_nondup.shape[1])
+        best_nd_score = sim_nondup[i_nd, j_nd]
+
+    return i_any, j_any, best_any_score, i_nd, j_nd, best_nd_score
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Cosine similarity between electronics products")
+    parser.add_argument("--csv", default="ElectronicsData.csv")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="processes used for text preprocessing and top-k blocks")
+    parser.add_argument("--top-k", type=int, default=0,
+                        help="keep the K most similar products of each product "
+                             "instead of the dense N x N matrix (0 = dense)")
+    parser.add_argument("--block-size", type=int, default=256,
+                        help="rows per block in --top-k mode")
+    parser.add_argument("--csv-matrix", action="store_true",
+                        help="also save the dense matrix as similarity_matrix.csv")
+    args = parser.parse_args()
+
     # 1. Load dataset
-    csv_path = "ElectronicsData.csv"  # make sure this file is in the same directory
+    csv_path = args.csv  # by default ElectronicsData.csv, in the same directory
     df = pd.read_csv(csv_path)
 
     # We will use both Title and Feature columns as our text
@@ -98,53 +141,45 @@ def main():
     lemmatizer = WordNetLemmatizer()
 
     # 3. Apply full preprocessing to all documents
-    print("Preprocessing text... This may take a few seconds.")
-    df["text_clean"] = df["text_raw"].apply(
-        lambda t: preprocess_text(t, stop_words, lemmatizer)
+    # Each document becomes its list of TF-IDF terms: the same terms as
+    # TfidfVectorizer() finds in preprocess_text's output (both in text_preprocessing.py)
+    print(f"Preprocessing text with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    documents = tokenize_documents(
+        df["text_raw"], stop_words, lemmatizer, workers=args.workers
     )
+    print(f"Preprocessed {len(df)} documents in {time.perf_counter() - start:.2f}s")
 
-    # 4. TF-IDF vectorization
+    # 4. TF-IDF vectorization (the documents are already tokenized)
     print("Computing TF-IDF matrix...")
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(df["text_clean"])
+    vectorizer = TfidfVectorizer(analyzer=pretokenized)
+    tfidf_matrix = vectorizer.fit_transform(documents)
 
     print("TF-IDF matrix shape:", tfidf_matrix.shape)
 
-    # 5. Cosine similarity matrix
-    print("Computing cosine similarity matrix...")
-    similarity_matrix = cosine_similarity(tfidf_matrix)
-
-    # zero out self-similarity on the diagonal
-    np.fill_diagonal(similarity_matrix, 0.0)
-
-    # 6. Save similarity matrix to CSV (optional, but nice for the assignment)
-    print("Saving similarity matrix to similarity_matrix.csv ...")
-    sim_df = pd.DataFrame(
-        similarity_matrix,
-        index=df["Title"],
-        columns=df["Title"],
-    )
-    sim_df.to_csv("similarity_matrix.csv", encoding="utf-8")
-
-    # 7. Find most similar pairs
-
-    # 7.1 Most similar pair overall (can include near-duplicates)
-    flat_index = np.argmax(similarity_matrix)
-    i_any, j_any = divmod(flat_index, similarity_matrix.shape[1])
-    best_any_score = similarity_matrix[i_any, j_any]
-
-    # 7.2 Most similar NON-identical pair (ignore scores >= 0.999)
-    sim_nondup = similarity_matrix.copy()
-    sim_nondup[sim_nondup >= 0.999] = 0.0
-
-    if np.all(sim_nondup == 0.0):
-        # fallback if everything is < 0.999 or there are no duplicates
-        i_nd, j_nd = i_any, j_any
-        best_nd_score = best_any_score
+    if args.top_k > 0:
+        # 5-6. Top-k neighbor table: the k best products of each one, best first
+        print(f"Computing top-{args.top_k} neighbors in blocks of {args.block_size} rows...")
+        start = time.perf_counter()
+        neighbors, scores = top_k_neighbors(
+            tfidf_matrix, k=args.top_k, block_size=args.block_size, workers=args.workers
+        )
+        print(f"Neighbor table {neighbors.shape} in {time.perf_counter() - start:.2f}s "
+              f"({(neighbors.nbytes + scores.nbytes) / 1e6:.1f} MB)")
+        print("Saving neighbor table to similarity_neighbors.npz ...")
+        np.savez_compressed("similarity_neighbors.npz", neighbors=neighbors, scores=scores,
+                            titles=df["Title"].to_numpy(dtype=str))
+
+        # 7. Most similar pairs, from the table (exact unless a product has
+        # top-k or more near-duplicates)
+        i_any, j_any, best_any_score = most_similar_pair(neighbors, scores)
+        i_nd, j_nd, best_nd_score = most_similar_pair(neighbors, scores, below=0.999)
+        if i_nd < 0:
+            i_nd, j_nd, best_nd_score = i_any, j_any, best_any_score
     else:
-        flat_index_nd = np.argmax(sim_nondup)
-        i_nd, j_nd = divmod(flat_index_nd, sim_nondup.shape[1])
-        best_nd_score = sim_nondup[i_nd, j_nd]
+        i_any, j_any, best_any_score, i_nd, j_nd, best_nd_score = dense_similarity(
+            df, tfidf_matrix, csv_matrix=args.csv_matrix
+        )
 
     # Extract product info
     def product_info(idx):
@@ -0,0 +1,90 @@
+"""
+Binary storage for the product similarity matrix.
+
+similarity_matrix.csv stores N x N floats as text labeled by Title: it is
+huge, slow to write and to parse, rounds the scores, and its labels are
+ambiguous when titles repeat. Here the matrix is a float32 .npy file,
+written one block of rows at a time, next to an index CSV that maps every
+row to its product id (the row of the product in the catalog CSV), title
+and sub-category. `SimilarityMatrix` memory-maps the .npy file, so reading
+one product's row only reads that row from disk.
+"""
+
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+MATRIX_FILE = "similarity_matrix.npy"
+INDEX_FILE = "similarity_index.csv"
+
+
+def save_similarity(matrix: np.ndarray, index: pd.DataFrame, directory: str = ".",
+                    block_size: int = 4096) -> Tuple[str, str]:
+    """
+    Save an N x N similarity matrix as float32 .npy + the index CSV.
+
+    `index` has one row per matrix row, in the same order; its index holds
+    the product ids. Rows are converted to float32 in blocks, so no second
+    full-size copy of the matrix is made. Returns (matrix_path, index_path).
+    """
+    if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1] or matrix.shape[0] != len(index):
+        raise ValueError(f"Expected a square matrix with {len(index)} rows, got {matrix.shape}")
+
+    matrix_path = os.path.join(directory, MATRIX_FILE)
+    index_path = os.path.join(directory, INDEX_FILE)
+    out = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32, shape=matrix.shape)
+    for start in range(0, matrix.shape[0], block_size):
+        out[start:start + block_size] = matrix[start:start + block_size]
+    out.flush()
+    del out
+
+    index = index.copy()
+    index.index.name = "product_id"
+    index.to_csv(index_path, encoding="utf-8")
+    return matrix_path, index_path
+
+
+class SimilarityMatrix:
+    """
+    Read-only view of a matrix saved by `save_similarity`.
+
+    The matrix is memory-mapped: opening it reads only the .npy header and
+    the index CSV, and `row` / `most_similar` read one row of the file.
+    """
+
+    def __init__(self, directory: str = "."):
+        self.matrix = np.load(os.path.join(directory, MATRIX_FILE), mmap_mode="r")
+        # keep_default_na=False: empty titles stay "" like in the catalog
+        self.index = pd.read_csv(os.path.join(directory, INDEX_FILE), index_col="product_id",
+                                 dtype=str, keep_default_na=False)
+        self.index.index = self.index.index.astype(np.int64)
+        if len(self.index) != self.matrix.shape[0]:
+            raise ValueError(f"{INDEX_FILE} has {len(self.index)} products, "
+                             f"{MATRIX_FILE} has {self.matrix.shape[0]} rows")
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def position(self, product_id: int) -> int:
+        """Row of the matrix that holds `product_id`."""
+        return self.index.index.get_loc(product_id)
+
+    def row(self, product_id: int) -> np.ndarray:
+        """Similarities of one product to every product, in index order."""
+        return np.array(self.matrix[self.position(product_id)])
+
+    def most_similar(self, product_id: int, n: int = 10) -> pd.DataFrame:
+        """The n products most similar to `product_id`, best first, with a `score` column."""
+        scores = self.row(product_id)
+        scores[self.position(product_id)] = -np.inf
+        n = min(n, len(scores) - 1)
+        if n <= 0:
+            return self.index.iloc[:0].assign(score=np.float32(0))
+        best = np.argpartition(-scores, n - 1)[:n]
+        # best first, ties by lower position
+        best = best[np.lexsort((best, -scores[best]))]
+        result = self.index.iloc[best].copy()
+        result["score"] = scores[best]
+        return result
@@ -0,0 +1,114 @@
+"""
+Top-k cosine neighbors from a sparse TF-IDF matrix, without the N x N matrix.
+
+The TF-IDF rows are L2-normalized, so cosine similarity is a plain sparse
+product. It is computed one block of rows at a time (block x N, still
+sparse) and only the k best neighbors of every product are kept: memory is
+O(N * k) for the result plus one block per worker. Blocks run on a process
+pool, so every core does its share of the products and the selection.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Matrix shared with the pool workers, set up by the pool initializer
+_matrix: Optional[sparse.csr_matrix] = None
+_matrix_t: Optional[sparse.csr_matrix] = None
+
+
+def _init_worker(matrix: sparse.csr_matrix):
+    global _matrix, _matrix_t
+    _matrix = matrix
+    _matrix_t = matrix.T.tocsr()
+
+
+def _block_top_k(start: int, stop: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Neighbors and scores of rows start..stop, best first, ties by lower index."""
+    block = _matrix[start:stop] @ _matrix_t
+    # No product is its own neighbor
+    rows = np.repeat(np.arange(start, stop), np.diff(block.indptr))
+    block.data[block.indices == rows] = 0.0
+    block.eliminate_zeros()
+
+    neighbors = np.full((stop - start, k), -1, dtype=np.int32)
+    scores = np.zeros((stop - start, k))
+    for row in range(stop - start):
+        lo, hi = block.indptr[row], block.indptr[row + 1]
+        data, cols = block.data[lo:hi], block.indices[lo:hi]
+        if hi - lo > k:
+            best = np.argpartition(-data, k - 1)[:k]
+            data, cols = data[best], cols[best]
+        order = np.lexsort((cols, -data))
+        neighbors[row, :len(order)] = cols[order]
+        scores[row, :len(order)] = data[order]
+    return neighbors, scores
+
+
+def top_k_neighbors(matrix: sparse.spmatrix, k: int = 10, block_size: int = 256,
+                    workers: int = DEFAULT_WORKERS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbors of every row of a sparse matrix (e.g. the output
+    of TfidfVectorizer).
+
+    Returns (neighbors, scores) arrays of shape (N, k), best first; rows with
+    fewer than k non-zero similarities are padded with -1 / 0. Scores stay
+    float64 and equal the entries of cosine_similarity(matrix), which also
+    normalizes the rows first.
+    """
+    matrix = normalize(sparse.csr_matrix(matrix))
+    n_rows = matrix.shape[0]
+    k = max(0, min(k, n_rows - 1))
+    blocks = [(start, min(start + block_size, n_rows), k)
+              for start in range(0, n_rows, block_size)]
+    if k == 0 or not blocks:
+        return np.full((n_rows, k), -1, dtype=np.int32), np.zeros((n_rows, k))
+
+    if workers <= 1 or len(blocks) == 1:
+        _init_worker(matrix)
+        results = [_block_top_k(*block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(blocks)),
+                                 initializer=_init_worker, initargs=(matrix,)) as pool:
+            results = list(pool.map(_block_top_k, *zip(*blocks)))
+    return (np.concatenate([neighbors for neighbors, _ in results]),
+            np.concatenate([scores for _, scores in results]))
+
+
+def neighbors_to_sparse(neighbors: np.ndarray, scores: np.ndarray) -> sparse.csr_matrix:
+    """The neighbor table as a sparse N x N similarity matrix (k entries per row)."""
+    n_rows, k = neighbors.shape
+    keep = neighbors >= 0
+    rows = np.repeat(np.arange(n_rows), k).reshape(n_rows, k)
+    return sparse.csr_matrix((scores[keep], (rows[keep], neighbors[keep])),
+                             shape=(n_rows, n_rows))
+
+
+def most_similar_pair(neighbors: np.ndarray, scores: np.ndarray,
+                      below: Optional[float] = None) -> Tuple[int, int, float]:
+    """
+    Best (i, j, score) pair of the neighbor table, optionally only among
+    scores < `below`; ties go to the lowest i, then j, like np.argmax on the
+    dense matrix. Returns (-1, -1, 0.0) when no pair qualifies.
+
+    The pair is exact as long as no product has k or more neighbors at or
+    above `below` (they would push the best pair under it out of the table).
+    """
+    n_rows, k = neighbors.shape
+    rows = np.repeat(np.arange(n_rows), k)
+    cols = neighbors.ravel()
+    values = scores.ravel()
+    valid = cols >= 0
+    if below is not None:
+        valid &= values < below
+    if not valid.any():
+        return -1, -1, 0.0
+    rows, cols, values = rows[valid], cols[valid], values[valid]
+    best = np.lexsort((cols, rows, -values))[0]
+    return int(rows[best]), int(cols[best]), float(values[best])
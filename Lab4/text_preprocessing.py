@@ -0,0 +1,208 @@
+"""
+Parallel text preprocessing for the electronics catalog.
+
+`preprocess_text` is the original, one document at a time pipeline
+(lowercase, remove HTML tags, keep only letters, tokenize, remove
+stopwords, lemmatize). The functions below give exactly the same output,
+with speedups for large catalogs:
+
+- every distinct token is checked against the stopwords and lemmatized
+  once: product text repeats the same few thousand words, and the WordNet
+  lookups are most of the preprocessing time
+- documents are split into chunks that run on a process pool; each worker
+  keeps its lemma cache across all the chunks it processes
+- `tokenize_documents` cleans a whole chunk with vectorized pandas string
+  operations and returns the TF-IDF terms of each document, which
+  `TfidfVectorizer(analyzer=pretokenized)` takes as they are: no joining
+  into a string that the vectorizer splits again
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+HTML_TAG_PATTERN = re.compile(r"<.*?>")
+NON_LETTER_PATTERN = re.compile(r"[^a-z]")
+# Replacing non-letters with spaces and splitting leaves the runs of letters
+LETTERS_PATTERN = re.compile(r"[a-z]+")
+# TfidfVectorizer's default token_pattern
+TERM_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+def tokenize_series(texts: Iterable) -> pd.Series:
+    """
+    Lowercase, remove HTML tags, keep only letters and tokenize a whole column.
+
+    Non-string values are converted with str() first, like `preprocess_text`.
+    Returns one list of tokens per text.
+    """
+    # object dtype keeps Python's str.lower; Arrow-backed strings lowercase some letters differently
+    texts = pd.Series([text if isinstance(text, str) else str(text) for text in texts],
+                      dtype=object)
+    return (
+        texts.str.lower()
+        .str.replace(HTML_TAG_PATTERN, " ", regex=True)
+        .str.findall(LETTERS_PATTERN)
+    )
+
+
+def pretokenized(doc: List[str]) -> List[str]:
+    """TfidfVectorizer analyzer for documents that are already lists of terms."""
+    return doc
+
+
+def preprocess_text(text, stop_words, lemmatizer):
+    """
+    Reference implementation of the full preprocessing pipeline, one
+    document at a time:
+    - convert to lowercase
+    - remove HTML tags
+    - keep only letters
+    - tokenize
+    - remove stopwords
+    - lemmatize
+    Returns a cleaned string.
+    """
+    if not isinstance(text, str):
+        text = str(text)
+
+    # lowercase
+    text = text.lower()
+
+    # remove HTML tags if any
+    text = re.sub(r"<.*?>", " ", text)
+
+    # keep only letters (replace everything else with space)
+    text = re.sub(r"[^a-z]", " ", text)
+
+    # tokenize
+    tokens = text.split()
+
+    # remove stopwords and lemmatize
+    cleaned_tokens = []
+    for tok in tokens:
+        if tok not in stop_words:
+            lemma = lemmatizer.lemmatize(tok)
+            cleaned_tokens.append(lemma)
+
+    # join back into a string
+    return " ".join(cleaned_tokens)
+
+
+class LemmaCache:
+    """
+    Stopword filter + lemmatizer that looks up each distinct token once.
+
+    `lemmas` maps a token to its lemma, or to "" for a stopword; `terms`
+    maps a token to the TF-IDF terms its lemma yields (the default
+    vectorizer keeps words of 2+ characters).
+    """
+
+    def __init__(self, stop_words, lemmatizer):
+        self.stop_words = stop_words
+        self.lemmatizer = lemmatizer
+        self.lemmas: Dict[str, str] = {}
+        self.terms: Dict[str, Tuple[str, ...]] = {}
+
+    def lemma(self, token: str) -> str:
+        lemma = self.lemmas.get(token)
+        if lemma is None:
+            lemma = "" if token in self.stop_words else self.lemmatizer.lemmatize(token)
+            self.lemmas[token] = lemma
+        return lemma
+
+    def clean(self, text) -> str:
+        """Preprocess one document, like `preprocess_text`."""
+        if not isinstance(text, str):
+            text = str(text)
+        text = NON_LETTER_PATTERN.sub(" ", HTML_TAG_PATTERN.sub(" ", text.lower()))
+        lemmas = self.lemmas
+        cleaned_tokens = []
+        for tok in text.split():
+            lemma = lemmas.get(tok)
+            if lemma is None:
+                lemma = self.lemma(tok)
+            if lemma:
+                cleaned_tokens.append(lemma)
+        return " ".join(cleaned_tokens)
+
+    def clean_chunk(self, texts: List) -> List[str]:
+        return [self.clean(text) for text in texts]
+
+    def tokenize_chunk(self, texts: List) -> List[List[str]]:
+        """
+        TF-IDF terms of each document: the terms TfidfVectorizer() would
+        extract from the `clean` string, without building that string.
+        """
+        docs = tokenize_series(texts).tolist()
+        terms = self.terms
+        for token in set(chain.from_iterable(docs)).difference(terms):
+            terms[token] = tuple(TERM_PATTERN.findall(self.lemma(token).lower()))
+        lookup = terms.__getitem__
+        return [list(chain.from_iterable(map(lookup, doc))) for doc in docs]
+
+
+# One cache per worker process, set up by the pool initializer
+_worker_cache: Optional[LemmaCache] = None
+
+
+def _init_worker(stop_words, lemmatizer):
+    global _worker_cache
+    _worker_cache = LemmaCache(stop_words, lemmatizer)
+
+
+def _clean_chunk(texts: List) -> List[str]:
+    return _worker_cache.clean_chunk(texts)
+
+
+def _tokenize_chunk(texts: List) -> List[List[str]]:
+    return _worker_cache.tokenize_chunk(texts)
+
+
+def _map_chunks(texts: Iterable, stop_words, lemmatizer, workers: int, chunk_size: int,
+                method: Callable, worker_func: Callable) -> list:
+    texts = list(texts)
+    if workers <= 1 or len(texts) <= chunk_size:
+        return method(LemmaCache(stop_words, lemmatizer), texts)
+
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                             initializer=_init_worker,
+                             initargs=(set(stop_words), lemmatizer)) as pool:
+        return [doc for done in pool.map(worker_func, chunks) for doc in done]
+
+
+def preprocess_documents(texts: Iterable, stop_words, lemmatizer,
+                         workers: int = DEFAULT_WORKERS,
+                         chunk_size: int = 2000) -> List[str]:
+    """
+    Preprocess many documents into cleaned strings, in order.
+
+    With workers <= 1, or when everything fits in one chunk, the documents
+    are cleaned in this process (the lemma cache alone is most of the gain);
+    otherwise chunks of `chunk_size` documents are spread over `workers`
+    processes. The lemmatizer must be picklable (WordNetLemmatizer is).
+    """
+    return _map_chunks(texts, stop_words, lemmatizer, workers, chunk_size,
+                       LemmaCache.clean_chunk, _clean_chunk)
+
+
+def tokenize_documents(texts: Iterable, stop_words, lemmatizer,
+                       workers: int = DEFAULT_WORKERS,
+                       chunk_size: int = 20000) -> List[List[str]]:
+    """
+    Preprocess many documents straight into their TF-IDF terms, in order.
+
+    `TfidfVectorizer(analyzer=pretokenized).fit_transform(terms)` gives the
+    same matrix as `TfidfVectorizer().fit_transform(preprocess_documents(...))`.
+    Chunks are larger than for `preprocess_documents`, since the vectorized
+    string operations work on a whole chunk at once.
+    """
+    return _map_chunks(texts, stop_words, lemmatizer, workers, chunk_size,
+                       LemmaCache.tokenize_chunk, _tokenize_chunk)